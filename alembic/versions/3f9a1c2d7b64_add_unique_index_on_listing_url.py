@@ -0,0 +1,28 @@
+"""Add unique index on listing url
+
+Revision ID: 3f9a1c2d7b64
+Revises: 8c57b2c84100
+Create Date: 2026-01-12 10:04:11.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b64'
+down_revision: Union[str, Sequence[str], None] = '8c57b2c84100'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_listing_url', 'listing', ['url'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_listing_url', table_name='listing')
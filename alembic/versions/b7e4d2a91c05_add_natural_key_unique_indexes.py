@@ -0,0 +1,74 @@
+"""Add natural key unique indexes on location, building, owner and features
+
+Revision ID: b7e4d2a91c05
+Revises: 3f9a1c2d7b64
+Create Date: 2026-01-19 09:41:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a91c05'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c2d7b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, primary key, natural key columns)
+NATURAL_KEYS = [
+    ('location', 'location_id', ['locality', 'street', 'full_address']),
+    ('building', 'building_id', ['year_built', 'building_type', 'floor']),
+    ('owner', 'owner_id', ['owner_type']),
+    ('features', 'features_id', [
+        'has_basement',
+        'has_parking',
+        'kitchen_type',
+        'window_type',
+        'ownership_type',
+        'equipment',
+    ]),
+]
+
+
+def _merge_duplicates(table: str, id_column: str, key_columns: list) -> None:
+    """Point listings at the oldest row of each natural key and drop the rest."""
+    # Map every duplicate to the oldest id of its key in one pass over the
+    # table; PARTITION BY groups NULL key parts together, like IS
+    op.execute(sa.text(
+        "CREATE TEMP TABLE duplicate_map "
+        "(old_id INTEGER PRIMARY KEY, canonical_id INTEGER NOT NULL)"
+    ))
+    op.execute(sa.text(
+        f"INSERT INTO duplicate_map (old_id, canonical_id) "
+        f"SELECT {id_column}, canonical_id FROM ("
+        f"SELECT {id_column}, MIN({id_column}) OVER "
+        f"(PARTITION BY {', '.join(key_columns)}) AS canonical_id FROM {table}) "
+        f"WHERE {id_column} <> canonical_id"
+    ))
+    # Only listings that reference a duplicate are rewritten
+    op.execute(sa.text(
+        f"UPDATE listing SET {id_column} = ("
+        f"SELECT canonical_id FROM duplicate_map WHERE old_id = listing.{id_column}) "
+        f"WHERE {id_column} IN (SELECT old_id FROM duplicate_map)"
+    ))
+    op.execute(sa.text(
+        f"DELETE FROM {table} WHERE {id_column} IN (SELECT old_id FROM duplicate_map)"
+    ))
+    op.execute(sa.text("DROP TABLE duplicate_map"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, id_column, key_columns in NATURAL_KEYS:
+        _merge_duplicates(table, id_column, key_columns)
+        op.create_index(f'ix_{table}_natural_key', table, key_columns, unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, _, _ in reversed(NATURAL_KEYS):
+        op.drop_index(f'ix_{table}_natural_key', table_name=table)
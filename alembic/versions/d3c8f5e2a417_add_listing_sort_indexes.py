@@ -0,0 +1,39 @@
+"""Add listing sort indexes
+
+Revision ID: d3c8f5e2a417
+Revises: b7e4d2a91c05
+Create Date: 2026-01-26 14:22:37.905318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3c8f5e2a417'
+down_revision: Union[str, Sequence[str], None] = 'b7e4d2a91c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Must stay identical to models.models.listing_price_per_sqm, otherwise SQLite
+# does not use the index for ORDER BY
+PRICE_PER_SQM_EXPRESSION = "coalesce(price_sqm_zl, price_total_zl / (nullif(area, 0) + 0.0))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_listing_price_total_zl', 'listing', ['price_total_zl'])
+    op.create_index('ix_listing_area', 'listing', ['area'])
+    op.create_index('ix_listing_date_posted', 'listing', ['date_posted'])
+    op.create_index('ix_listing_price_per_sqm', 'listing', [sa.text(PRICE_PER_SQM_EXPRESSION)])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_listing_price_per_sqm', table_name='listing')
+    op.drop_index('ix_listing_date_posted', table_name='listing')
+    op.drop_index('ix_listing_area', table_name='listing')
+    op.drop_index('ix_listing_price_total_zl', table_name='listing')
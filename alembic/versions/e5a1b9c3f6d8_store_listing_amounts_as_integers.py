@@ -0,0 +1,63 @@
+"""Store listing prices and area as integer hundredths
+
+Revision ID: e5a1b9c3f6d8
+Revises: d3c8f5e2a417
+Create Date: 2026-02-02 11:37:05.461290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1b9c3f6d8'
+down_revision: Union[str, Sequence[str], None] = 'd3c8f5e2a417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Columns moved from NUMERIC to INTEGER hundredths (grosze, 0.01 m2)
+SCALED_COLUMNS = {
+    'area': sa.Numeric(precision=6, scale=2),
+    'price_total_zl': sa.Numeric(precision=12, scale=2),
+    'price_sqm_zl': sa.Numeric(precision=12, scale=2),
+    'price_per_sqm_detailed': sa.Numeric(precision=12, scale=2),
+}
+
+# Must stay identical to models.models.listing_price_per_sqm, otherwise SQLite
+# does not use the index for ORDER BY
+PRICE_PER_SQM_EXPRESSION = (
+    "coalesce(price_sqm_zl, (price_total_zl * 100) / (nullif(area, 0) + 0.0))"
+)
+OLD_PRICE_PER_SQM_EXPRESSION = "coalesce(price_sqm_zl, price_total_zl / (nullif(area, 0) + 0.0))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The expression index is not carried over by the batch table rebuild
+    op.drop_index('ix_listing_price_per_sqm', table_name='listing')
+
+    for column in SCALED_COLUMNS:
+        op.execute(f"UPDATE listing SET {column} = CAST(ROUND({column} * 100) AS INTEGER)")
+
+    with op.batch_alter_table('listing') as batch_op:
+        for column, numeric_type in SCALED_COLUMNS.items():
+            batch_op.alter_column(column, existing_type=numeric_type, type_=sa.Integer())
+
+    op.create_index('ix_listing_price_per_sqm', 'listing', [sa.text(PRICE_PER_SQM_EXPRESSION)])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_listing_price_per_sqm', table_name='listing')
+
+    with op.batch_alter_table('listing') as batch_op:
+        for column, numeric_type in SCALED_COLUMNS.items():
+            batch_op.alter_column(column, existing_type=sa.Integer(), type_=numeric_type)
+
+    for column in SCALED_COLUMNS:
+        op.execute(f"UPDATE listing SET {column} = {column} / 100.0")
+
+    op.create_index('ix_listing_price_per_sqm', 'listing', [sa.text(OLD_PRICE_PER_SQM_EXPRESSION)])
@@ -6,13 +6,79 @@ import os
 import re
 import requests
 import sys
+import time
 import argparse
-from typing import List, Dict
+import orjson
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Konfiguracja
 REPO_OWNER = "marcin119a"
 REPO_NAME = "project_tools"
 GITHUB_API_URL = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/issues"
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+REPO_INFO_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    isPrivate
+    hasIssuesEnabled
+    viewerPermission
+  }
+  viewer {
+    login
+  }
+}
+"""
+
+# Wspólna sesja HTTP - utrzymuje połączenia (keep-alive) do api.github.com
+# zamiast nawiązywać nowe połączenie TLS przy każdym żądaniu
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=10,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+    ),
+)
+
+# Równoległe tworzenie issues - limit współbieżności i odstęp między zgłoszeniami,
+# aby nie przekroczyć limitów GitHuba na tworzenie treści
+MAX_WORKERS = 10
+SUBMIT_INTERVAL = 0.2  # sekundy
+MAX_RATE_LIMIT_RETRIES = 3
+# Oczekiwanie, gdy nagłówka Retry-After nie da się odczytać (zalecenie GitHuba: co najmniej minuta)
+DEFAULT_RATE_LIMIT_DELAY = 60.0  # sekundy
+
+ISSUE_LABELS = ["user-story", "enhancement"]
+
+# Uprawnienia do repozytorium (viewerPermission), które pozwalają tworzyć issues;
+# w repozytorium publicznym issues może otwierać każdy, także z uprawnieniem READ
+ISSUE_WRITE_PERMISSIONS = {"TRIAGE", "WRITE", "MAINTAIN", "ADMIN"}
+
+# Nagłówek sekcji user story, np. "## 3. Dodawanie nowej lokalizacji"
+_SECTION_RE = re.compile(r'^##\s+\d+\.\s+', re.MULTILINE)
+
+# Jedna linia treści user story: "**Jako** ...", nagłówek listy "**Akceptacja:**"
+# albo element listy "- ..."; pozostałe linie są pomijane
+_STORY_LINE_RE = re.compile(
+    r'^[ \t]*(?:'
+    r'\*\*(?P<key>Jako|Chcę|Aby)\*\*(?P<value>.*?)'
+    r'|\*\*(?P<section>Akceptacja|Dane wejściowe|Parametry):\*\*'
+    r'|- (?P<item>.*?\S)'
+    r')[ \t\r]*$',
+    re.MULTILINE,
+)
+
+
+def parse_json(response: requests.Response) -> Dict:
+    """Dekoduje odpowiedź API przez orjson; pusta odpowiedź daje pusty słownik"""
+    return orjson.loads(response.content) if response.content else {}
 
 
 def get_github_token() -> str:
@@ -33,85 +99,36 @@ def parse_user_stories(file_path: str) -> List[Dict]:
     
     stories = []
     # Dzielimy na sekcje (każda zaczyna się od ##)
-    sections = re.split(r'^##\s+\d+\.\s+', content, flags=re.MULTILINE)
+    sections = _SECTION_RE.split(content)
     
     for section in sections[1:]:  # Pomijamy pierwszy element (nagłówek)
-        lines = section.strip().split('\n')
-        if not lines:
-            continue
-        
-        # Tytuł to pierwsza linia
-        title = lines[0].strip()
-        
-        # Szukamy sekcji "Jako", "Chcę", "Aby"
-        jako = ""
-        chce = ""
-        aby = ""
-        akceptacja = []
-        dane_wejściowe = []
-        parametry = []
-        
-        current_section = None
-        body_lines = []
-        
-        for i, line in enumerate(lines[1:], 1):
-            line = line.strip()
-            if not line:
-                continue
-            
-            if line.startswith("**Jako**"):
-                jako = line.replace("**Jako**", "").strip()
-            elif line.startswith("**Chcę**"):
-                chce = line.replace("**Chcę**", "").strip()
-            elif line.startswith("**Aby**"):
-                aby = line.replace("**Aby**", "").strip()
-            elif line == "**Akceptacja:**":
-                current_section = "akceptacja"
-            elif line == "**Dane wejściowe:**":
-                current_section = "dane_wejściowe"
-            elif line == "**Parametry:**":
-                current_section = "parametry"
-            elif line.startswith("- "):
-                if current_section == "akceptacja":
-                    akceptacja.append(line[2:])
-                elif current_section == "dane_wejściowe":
-                    dane_wejściowe.append(line[2:])
-                elif current_section == "parametry":
-                    parametry.append(line[2:])
-            elif not line.startswith("---"):
-                body_lines.append(line)
-        
-        # Budujemy body issue
-        body_parts = []
-        if jako or chce or aby:
-            body_parts.append("## Opis")
-            if jako:
-                body_parts.append(f"**Jako** {jako}")
-            if chce:
-                body_parts.append(f"**Chcę** {chce}")
-            if aby:
-                body_parts.append(f"**Aby** {aby}")
-            body_parts.append("")
-        
-        if akceptacja:
-            body_parts.append("## Akceptacja")
-            for item in akceptacja:
-                body_parts.append(f"- {item}")
-            body_parts.append("")
+        # Tytuł to pierwsza linia, reszta to treść user story
+        title, _, content_text = section.strip().partition('\n')
+        title = title.strip()
         
-        if dane_wejściowe:
-            body_parts.append("## Dane wejściowe")
-            for item in dane_wejściowe:
-                body_parts.append(f"- {item}")
-            body_parts.append("")
+        # Szukamy sekcji "Jako", "Chcę", "Aby" oraz list w sekcjach
+        fields = {"Jako": "", "Chcę": "", "Aby": ""}
+        lists = {"Akceptacja": [], "Dane wejściowe": [], "Parametry": []}
+        current_list = None
         
-        if parametry:
-            body_parts.append("## Parametry")
-            for item in parametry:
-                body_parts.append(f"- {item}")
-            body_parts.append("")
+        for match in _STORY_LINE_RE.finditer(content_text):
+            if match.group("key"):
+                fields[match.group("key")] = match.group("value").strip()
+            elif match.group("section"):
+                current_list = lists[match.group("section")]
+            elif current_list is not None:
+                current_list.append(match.group("item"))
         
-        body = "\n".join(body_parts)
+        # Budujemy body issue - każdy niepusty blok to nagłówek z liniami,
+        # bloki rozdziela pusta linia
+        opis = "\n".join(f"**{key}** {value}" for key, value in fields.items() if value)
+        blocks = [f"## Opis\n{opis}\n"] if opis else []
+        blocks.extend(
+            f"## {name}\n" + "\n".join(f"- {item}" for item in items) + "\n"
+            for name, items in lists.items()
+            if items
+        )
+        body = "\n".join(blocks)
         
         stories.append({
             "title": title,
@@ -121,125 +138,144 @@ def parse_user_stories(file_path: str) -> List[Dict]:
     return stories
 
 
-def verify_repo_access(token: str) -> bool:
-    """Sprawdza czy mamy dostęp do repozytorium"""
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    repo_url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}"
-    response = requests.get(repo_url, headers=headers)
+def verify_repo_access() -> Optional[Dict]:
+    """
+    Sprawdza czy mamy dostęp do repozytorium.
+
+    Jedno zapytanie GraphQL zwraca widoczność repozytorium, to czy issues są
+    włączone oraz uprawnienia tokenu - zamiast osobnych wywołań REST.
+    Zwraca dane repozytorium albo None, gdy dostęp nie jest możliwy.
+    """
+    response = SESSION.post(
+        GITHUB_GRAPHQL_URL,
+        json={"query": REPO_INFO_QUERY, "variables": {"owner": REPO_OWNER, "name": REPO_NAME}},
+    )
     
     if response.status_code == 200:
-        repo_data = response.json()
-        is_private = repo_data.get("private", False)
-        if is_private:
+        repo_data = (parse_json(response).get("data") or {}).get("repository")
+        if repo_data is None:
+            # GraphQL zgłasza brak repozytorium jako błąd NOT_FOUND w treści odpowiedzi
+            print(f"Błąd: Repozytorium {REPO_OWNER}/{REPO_NAME} nie istnieje lub nie masz do niego dostępu.")
+            print("\nMożliwe przyczyny:")
+            print("1. Repozytorium jest prywatne i token nie ma uprawnień 'repo'")
+            print("2. Repozytorium nie istnieje")
+            print("3. Nieprawidłowa nazwa właściciela lub repozytorium")
+            print("\nSpróbuj utworzyć token z pełnymi uprawnieniami 'repo' na:")
+            print("https://github.com/settings/tokens")
+            return None
+        if repo_data.get("isPrivate", False):
             print(f"✓ Repozytorium jest prywatne - dostęp potwierdzony")
         else:
             print(f"✓ Repozytorium jest publiczne - dostęp potwierdzony")
-        return True
+        return repo_data
     elif response.status_code == 401:
         print("Błąd: Nieprawidłowy token GitHub lub token wygasł.")
         print("Sprawdź czy token ma uprawnienia 'repo'")
         print("Utwórz nowy token na: https://github.com/settings/tokens")
-        return False
-    elif response.status_code == 404:
-        print(f"Błąd: Repozytorium {REPO_OWNER}/{REPO_NAME} nie istnieje lub nie masz do niego dostępu.")
-        print("\nMożliwe przyczyny:")
-        print("1. Repozytorium jest prywatne i token nie ma uprawnień 'repo'")
-        print("2. Repozytorium nie istnieje")
-        print("3. Nieprawidłowa nazwa właściciela lub repozytorium")
-        print("\nSpróbuj utworzyć token z pełnymi uprawnieniami 'repo' na:")
-        print("https://github.com/settings/tokens")
-        return False
+        return None
     else:
         print(f"Błąd przy sprawdzaniu dostępu: {response.status_code}")
-        error_data = response.json() if response.text else {}
+        error_data = parse_json(response)
         error_msg = error_data.get("message", response.text)
         print(f"Wiadomość: {error_msg}")
-        return False
+        return None
 
 
-def check_issues_enabled(token: str) -> bool:
+def check_issues_enabled(repo_data: Dict) -> bool:
     """Sprawdza czy issues są włączone w repozytorium"""
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    repo_url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}"
-    response = requests.get(repo_url, headers=headers)
-    
-    if response.status_code == 200:
-        repo_data = response.json()
-        has_issues = repo_data.get("has_issues", False)
-        return has_issues
-    return False
+    return repo_data.get("hasIssuesEnabled", False)
 
 
-def check_token_permissions(token: str) -> Dict:
+def check_token_permissions(repo_data: Dict) -> Dict:
     """Sprawdza uprawnienia tokenu"""
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    # Sprawdzamy uprawnienia przez próbę utworzenia testowego issue
-    test_data = {
-        "title": "TEST - można usunąć",
-        "body": "To jest test uprawnień. Możesz to usunąć."
-    }
-    
-    response = requests.post(GITHUB_API_URL, json=test_data, headers=headers)
-    
-    if response.status_code == 201:
-        # Usuwamy testowe issue
-        issue_data = response.json()
-        issue_number = issue_data.get("number")
-        delete_url = f"{GITHUB_API_URL}/{issue_number}"
-        requests.patch(delete_url, json={"state": "closed"}, headers=headers)
+    # Uprawnienie do repozytorium zwrócone przez GraphQL - bez tworzenia testowego issue
+    permission = repo_data.get("viewerPermission")
+    is_public = repo_data.get("isPrivate") is False
+    if permission in ISSUE_WRITE_PERMISSIONS or (is_public and permission == "READ"):
         return {"can_create": True, "message": "Token ma uprawnienia do tworzenia issues"}
-    elif response.status_code == 403:
-        error_data = response.json() if response.text else {}
-        return {"can_create": False, "message": error_data.get("message", "Brak uprawnień")}
-    else:
-        return {"can_create": False, "message": f"Nieoczekiwany błąd: {response.status_code}"}
+    return {
+        "can_create": False,
+        "message": f"Brak uprawnień (uprawnienie do repozytorium: {permission or 'brak'})",
+    }
+
+
+def parse_retry_after(value: str) -> float:
+    """
+    Zamienia nagłówek Retry-After na liczbę sekund.
+
+    RFC 9110 dopuszcza liczbę sekund albo datę HTTP; wartość, której nie da się
+    odczytać, daje DEFAULT_RATE_LIMIT_DELAY.
+    """
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return DEFAULT_RATE_LIMIT_DELAY
+
+
+def rate_limit_delay(response: requests.Response) -> Optional[float]:
+    """Zwraca czas oczekiwania (w sekundach), jeśli GitHub zgłosił przekroczenie limitu"""
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        return parse_retry_after(retry_after)
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        reset_at = response.headers.get("X-RateLimit-Reset")
+        if reset_at:
+            return max(float(reset_at) - time.time(), 0) + 1
+    return None
+
 
+def post_with_rate_limit(url: str, data: Dict) -> requests.Response:
+    """Wysyła POST, ponawiając go po czasie wskazanym przez GitHub przy przekroczeniu limitu"""
+    for attempt in range(1, MAX_RATE_LIMIT_RETRIES + 1):
+        response = SESSION.post(url, json=data)
+        delay = rate_limit_delay(response)
+        # Po ostatniej próbie nie czekamy - wynik i tak nie zostanie ponowiony
+        if delay is None or attempt == MAX_RATE_LIMIT_RETRIES:
+            return response
+        time.sleep(delay)
 
-def create_issue(token: str, title: str, body: str) -> Dict:
+
+def is_labels_error(response: requests.Response) -> bool:
+    """Sprawdza czy błąd walidacji 422 dotyczy etykiet issue"""
+    if response.status_code != 422:
+        return False
+    errors = parse_json(response).get("errors", [])
+    return any(
+        isinstance(error, dict)
+        and (error.get("field") == "labels" or error.get("resource") == "Label")
+        for error in errors
+    )
+
+
+def create_issue(title: str, body: str) -> Dict:
     """Tworzy issue na GitHubie"""
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    # Najpierw próbujemy bez etykiet (mogą nie istnieć w repozytorium)
+    # Etykiety wysyłamy razem z issue - jedno żądanie zamiast dwóch
     data = {
         "title": title,
-        "body": body
+        "body": body,
+        "labels": ISSUE_LABELS,
     }
     
-    response = requests.post(GITHUB_API_URL, json=data, headers=headers)
+    response = post_with_rate_limit(GITHUB_API_URL, data)
+    
+    # Etykiet nie udało się przypisać (np. brak uprawnień) - tworzymy issue bez nich;
+    # inne błędy walidacji są zgłaszane poniżej
+    if is_labels_error(response):
+        print(f"  ⚠️  Uwaga: Nie udało się dodać etykiet do '{title}', tworzenie bez etykiet")
+        del data["labels"]
+        response = post_with_rate_limit(GITHUB_API_URL, data)
     
-    # Jeśli się udało, próbujemy dodać etykiety
     if response.status_code == 201:
-        issue_data = response.json()
-        issue_number = issue_data.get("number")
-        
-        # Próbujemy dodać etykiety (jeśli nie istnieją, po prostu je pomijamy)
-        labels_url = f"{GITHUB_API_URL}/{issue_number}/labels"
-        labels_data = {"labels": ["user-story", "enhancement"]}
-        labels_response = requests.post(labels_url, json=labels_data, headers=headers)
-        
-        # Nie traktujemy błędu z etykietami jako krytyczny
-        if labels_response.status_code not in [200, 201]:
-            print(f"  ⚠️  Uwaga: Nie udało się dodać etykiet (może nie istnieją w repozytorium)")
-        
-        return issue_data
+        return parse_json(response)
     elif response.status_code == 403:
         print(f"Błąd 403: Brak uprawnień do tworzenia issues")
-        error_data = response.json() if response.text else {}
+        error_data = parse_json(response)
         error_msg = error_data.get("message", response.text)
         print(f"Wiadomość: {error_msg}")
         print("\n💡 Rozwiązanie:")
@@ -258,7 +294,7 @@ def create_issue(token: str, title: str, body: str) -> Dict:
         return None
     else:
         print(f"Błąd przy tworzeniu issue '{title}': {response.status_code}")
-        error_data = response.json() if response.text else {}
+        error_data = parse_json(response)
         error_msg = error_data.get("message", response.text)
         print(f"Wiadomość: {error_msg}")
         if "documentation_url" in error_data:
@@ -277,6 +313,10 @@ def main():
     args = parser.parse_args()
     
     token = get_github_token()
+    SESSION.headers.update({
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/vnd.github.v3+json"
+    })
     stories_file = args.file
     
     if not os.path.exists(stories_file):
@@ -284,7 +324,8 @@ def main():
         sys.exit(1)
     
     print(f"Sprawdzanie dostępu do repozytorium {REPO_OWNER}/{REPO_NAME}...")
-    if not verify_repo_access(token):
+    repo_data = verify_repo_access()
+    if not repo_data:
         print("\n💡 Wskazówka: Jeśli repozytorium jest prywatne, upewnij się że:")
         print("   - Token ma uprawnienia 'repo' (pełny dostęp do repozytoriów)")
         print("   - Token nie wygasł")
@@ -292,7 +333,7 @@ def main():
         sys.exit(1)
     
     print("Sprawdzanie czy issues są włączone...")
-    if not check_issues_enabled(token):
+    if not check_issues_enabled(repo_data):
         print("⚠️  Issues są wyłączone w tym repozytorium!")
         print(f"Włącz issues w ustawieniach: https://github.com/{REPO_OWNER}/{REPO_NAME}/settings")
         print("Settings -> General -> Features -> Issues")
@@ -300,7 +341,7 @@ def main():
     print("✓ Issues są włączone")
     
     print("Sprawdzanie uprawnień tokenu do tworzenia issues...")
-    perm_check = check_token_permissions(token)
+    perm_check = check_token_permissions(repo_data)
     if not perm_check["can_create"]:
         print(f"❌ {perm_check['message']}")
         print("\n💡 Token nie ma uprawnień do tworzenia issues!")
@@ -327,17 +368,29 @@ def main():
     created = 0
     failed = 0
     
-    for i, story in enumerate(stories, 1):
-        print(f"[{i}/{len(stories)}] Tworzenie issue: {story['title']}")
-        result = create_issue(token, story['title'], story['body'])
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {}
+        for i, story in enumerate(stories, 1):
+            print(f"[{i}/{len(stories)}] Tworzenie issue: {story['title']}")
+            future = executor.submit(create_issue, story['title'], story['body'])
+            futures[future] = (i, story)
+            time.sleep(SUBMIT_INTERVAL)
         
-        if result:
-            print(f"  ✓ Utworzono: {result['html_url']}")
-            created += 1
-        else:
-            print(f"  ✗ Nie udało się utworzyć issue")
-            failed += 1
-        print()
+        # Wyniki zbieramy w wątku głównym, więc liczniki nie wymagają blokady
+        for future in as_completed(futures):
+            i, story = futures[future]
+            try:
+                result = future.result()
+            except requests.RequestException as e:
+                print(f"  Błąd połączenia: {e}")
+                result = None
+            
+            if result:
+                print(f"[{i}/{len(stories)}] ✓ Utworzono: {result['html_url']}")
+                created += 1
+            else:
+                print(f"[{i}/{len(stories)}] ✗ Nie udało się utworzyć issue: {story['title']}")
+                failed += 1
     
     print(f"\nPodsumowanie:")
     print(f"  Utworzono: {created}")
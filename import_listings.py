@@ -6,9 +6,15 @@ import csv
 import re
 from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
-from typing import Optional, Dict, Any
+from functools import partial
+from itertools import islice
+from operator import itemgetter
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 import asyncio
+import threading
 
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
@@ -16,6 +22,25 @@ from models.database import async_session_maker
 from models.models import Location, Building, Owner, Features, Listing
 
 
+# Patterns and formats used by the per-row parsers, compiled once at import
+_FLOOR_RE = re.compile(r"(\d+)")
+_DAYS_AGO_RE = re.compile(r"(\d+)\s*dni?\s*temu")
+# Single-pass replacements: drop thousands separators, use "." as decimal point
+_INT_TRANS = str.maketrans({" ": None})
+_DECIMAL_TRANS = str.maketrans({" ": None, ",": "."})
+# Lowercase spellings recognised by the parsers
+_TRUE_VALUES = frozenset({"tak", "yes", "true", "1", "t"})
+_FALSE_VALUES = frozenset({"nie", "no", "false", "0", "f", ""})
+_NULL_VALUES = frozenset({"", "none", "null"})
+_NULL_DECIMAL_VALUES = _NULL_VALUES | {"zapytaj o cenę"}
+_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d.%m.%Y",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+)
+
+
 def clean_string(value: str) -> Optional[str]:
     """Clean string value - strip whitespace and return None if empty."""
     if not value or not isinstance(value, str):
@@ -30,8 +55,8 @@ def parse_int(value: str) -> Optional[int]:
         return None
     if isinstance(value, int):
         return value
-    cleaned = str(value).strip().replace(" ", "")
-    if not cleaned or cleaned.lower() in ["", "none", "null"]:
+    cleaned = str(value).strip().translate(_INT_TRANS)
+    if not cleaned or cleaned.lower() in _NULL_VALUES:
         return None
     try:
         return int(cleaned)
@@ -43,10 +68,13 @@ def parse_decimal(value: str) -> Optional[Decimal]:
     """Parse decimal from string, handling spaces and empty values."""
     if not value:
         return None
-    if isinstance(value, (int, float)):
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        # Via str so that 0.1 becomes Decimal("0.1"), not its binary expansion
         return Decimal(str(value))
-    cleaned = str(value).strip().replace(" ", "").replace(",", ".")
-    if not cleaned or cleaned.lower() in ["", "none", "null", "zapytaj o cenę"]:
+    cleaned = str(value).strip().translate(_DECIMAL_TRANS)
+    if not cleaned or cleaned.lower() in _NULL_DECIMAL_VALUES:
         return None
     try:
         return Decimal(cleaned)
@@ -59,9 +87,9 @@ def parse_boolean(value: str) -> Optional[bool]:
     if not value:
         return None
     cleaned = str(value).strip().lower()
-    if cleaned in ["tak", "yes", "true", "1", "t"]:
+    if cleaned in _TRUE_VALUES:
         return True
-    if cleaned in ["nie", "no", "false", "0", "f", ""]:
+    if cleaned in _FALSE_VALUES:
         return False
     return None
 
@@ -74,7 +102,7 @@ def parse_floor(value: str) -> Optional[int]:
     if cleaned == "parter":
         return 0
     # Extract first number from string like "3 / winda" or "5"
-    match = re.search(r"(\d+)", cleaned)
+    match = _FLOOR_RE.search(cleaned)
     if match:
         try:
             return int(match.group(1))
@@ -83,14 +111,19 @@ def parse_floor(value: str) -> Optional[int]:
     return None
 
 
-def parse_date(value: str) -> Optional[datetime]:
-    """Parse date from Polish text format."""
+def parse_date(value: str, today: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Parse date from Polish text format.
+    
+    Relative dates ("wczoraj", "3 dni temu") are resolved against today,
+    which callers parsing many rows should compute once and pass in.
+    """
     if not value:
         return None
     cleaned = str(value).strip().lower()
     
     # Handle relative dates
-    today = datetime.now()
+    today = today or datetime.now()
     if "wczoraj" in cleaned or "yesterday" in cleaned:
         return today - timedelta(days=1)
     if "dzisiaj" in cleaned or "today" in cleaned:
@@ -101,19 +134,13 @@ def parse_date(value: str) -> Optional[datetime]:
         return today - timedelta(days=7)
     
     # Try to extract days ago
-    days_match = re.search(r"(\d+)\s*dni?\s*temu", cleaned)
+    days_match = _DAYS_AGO_RE.search(cleaned)
     if days_match:
         days = int(days_match.group(1))
         return today - timedelta(days=days)
     
     # Try standard date formats
-    date_formats = [
-        "%Y-%m-%d",
-        "%d.%m.%Y",
-        "%d/%m/%Y",
-        "%Y/%m/%d",
-    ]
-    for fmt in date_formats:
+    for fmt in _DATE_FORMATS:
         try:
             return datetime.strptime(cleaned, fmt)
         except (ValueError, TypeError):
@@ -122,315 +149,502 @@ def parse_date(value: str) -> Optional[datetime]:
     return None
 
 
-async def get_or_create_location(
-    session: AsyncSession,
-    locality: Optional[str],
-    street: Optional[str],
-    city_district: Optional[str],
-    full_address: Optional[str],
-    latitude: Optional[Decimal],
-    longitude: Optional[Decimal],
-) -> Location:
-    """Get existing location or create new one."""
-    # Try to find existing location by unique combination
-    query = select(Location)
-    conditions = []
-    
-    if locality:
-        conditions.append(Location.locality == locality)
-    if street:
-        conditions.append(Location.street == street)
-    if full_address:
-        conditions.append(Location.full_address == full_address)
-    
-    if conditions:
-        query = query.where(*conditions)
-        result = await session.execute(query)
-        existing = result.scalar_one_or_none()
-        if existing:
-            return existing
-    
-    # Create new location
-    location = Location(
-        locality=locality,
-        street=street,
-        city_district=city_district,
-        full_address=full_address,
-        latitude=latitude,
-        longitude=longitude,
-    )
-    session.add(location)
-    await session.flush()
-    return location
+# Natural keys used to deduplicate related entities within an import batch;
+# they match the unique ix_*_natural_key indexes declared in models.models
+LOCATION_KEY = ("locality", "street", "full_address")
+LOCATION_FIELDS = LOCATION_KEY + ("city_district", "latitude", "longitude")
+BUILDING_KEY = ("year_built", "building_type", "floor")
+OWNER_KEY = ("owner_type",)
+FEATURES_KEY = (
+    "has_basement",
+    "has_parking",
+    "kitchen_type",
+    "window_type",
+    "ownership_type",
+    "equipment",
+)
+LISTING_FIELDS = (
+    "rooms",
+    "area",
+    "price_total_zl",
+    "price_sqm_zl",
+    "price_per_sqm_detailed",
+    "date_posted",
+    "photo_count",
+    "url",
+    "image_url",
+    "description_text",
+)
+
+
+def new_id_caches() -> Dict[str, Dict[Tuple[Any, ...], int]]:
+    """
+    Create empty natural key -> id caches for the related tables.
+
+    Ids (not ORM objects) are cached, so entries stay valid across commits.
+    """
+    return {"location": {}, "building": {}, "owner": {}, "features": {}}
 
 
-async def get_or_create_building(
+def natural_key(cleaned: Dict[str, Any], key_fields: Tuple[str, ...]) -> Tuple[Any, ...]:
+    """Build the hashable natural key of an entity from a cleaned row."""
+    return tuple(cleaned[field] for field in key_fields)
+
+
+async def select_ids(
     session: AsyncSession,
-    year_built: Optional[int],
-    building_type: Optional[str],
-    floor: Optional[int],
-) -> Building:
-    """Get existing building or create new one."""
-    # Try to find existing building
-    query = select(Building).where(
-        Building.year_built == year_built,
-        Building.building_type == building_type,
-        Building.floor == floor,
+    id_column: Any,
+    key_columns: List[Any],
+    keys: List[Tuple[Any, ...]],
+) -> Dict[Tuple[Any, ...], int]:
+    """Fetch the primary keys of existing rows matching any of the natural keys."""
+    complete = [key for key in keys if None not in key]
+    partial_keys = [key for key in keys if None in key]
+
+    # Keys without NULL parts go into one row-value IN list that the unique
+    # index can serve; the rest need a NULL-safe comparison per key
+    conditions = []
+    if complete:
+        conditions.append(tuple_(*key_columns).in_(complete))
+    conditions.extend(
+        and_(*(column.is_not_distinct_from(value) for column, value in zip(key_columns, key)))
+        for key in partial_keys
     )
+    query = select(id_column, *key_columns).where(or_(*conditions))
     result = await session.execute(query)
-    existing = result.scalar_one_or_none()
-    if existing:
-        return existing
-    
-    # Create new building
-    building = Building(
-        year_built=year_built,
-        building_type=building_type,
-        floor=floor,
-    )
-    session.add(building)
-    await session.flush()
-    return building
+    return {tuple(key): row_id for row_id, *key in result.all()}
 
 
-async def get_or_create_owner(
+async def resolve_ids(
     session: AsyncSession,
-    owner_type: Optional[str],
-) -> Owner:
-    """Get existing owner or create new one."""
-    # Try to find existing owner by type
-    query = select(Owner).where(Owner.owner_type == owner_type)
-    result = await session.execute(query)
-    existing = result.scalar_one_or_none()
-    if existing:
-        return existing
-    
-    # Create new owner
-    owner = Owner(owner_type=owner_type)
-    session.add(owner)
-    await session.flush()
-    return owner
+    model: Any,
+    id_field: str,
+    key_fields: Tuple[str, ...],
+    batch: List[Dict[str, Any]],
+    fields: Optional[Tuple[str, ...]] = None,
+    cache: Optional[Dict[Tuple[Any, ...], int]] = None,
+) -> Dict[Tuple[Any, ...], int]:
+    """
+    Map every natural key referenced by the batch to a primary key.
 
+    Keys are deduplicated in memory, existing rows are fetched with a single
+    SELECT and the missing ones are created with a single
+    INSERT ... ON CONFLICT DO NOTHING RETURNING. Keys whose insert conflicted
+    with a row written meanwhile by another import are fetched once more.
 
-async def get_or_create_features(
-    session: AsyncSession,
-    has_basement: Optional[bool],
-    has_parking: Optional[bool],
-    kitchen_type: Optional[str],
-    window_type: Optional[str],
-    ownership_type: Optional[str],
-    equipment: Optional[str],
-) -> Features:
-    """Get existing features or create new one."""
-    # Try to find existing features
-    query = select(Features).where(
-        Features.has_basement == has_basement,
-        Features.has_parking == has_parking,
-        Features.kitchen_type == kitchen_type,
-        Features.window_type == window_type,
-        Features.ownership_type == ownership_type,
-        Features.equipment == equipment,
+    Args:
+        session: Database session
+        model: SQLModel table class to resolve
+        id_field: Name of the primary key column
+        key_fields: Columns forming the natural key
+        batch: Cleaned rows referencing the entity
+        fields: Columns to populate on insert (defaults to key_fields)
+        cache: Ids resolved by previous batches; updated in place and
+            keys already present in it are not queried again
+
+    Returns:
+        Mapping of natural key tuple to primary key
+    """
+    fields = fields or key_fields
+    ids = cache if cache is not None else {}
+    if not batch:
+        return ids
+
+    pending: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for cleaned in batch:
+        key = natural_key(cleaned, key_fields)
+        if key not in ids and key not in pending:
+            pending[key] = {field: cleaned[field] for field in fields}
+
+    if not pending:
+        return ids
+
+    id_column = getattr(model, id_field)
+    key_columns = [getattr(model, field) for field in key_fields]
+
+    # The SELECT runs first because SQLite unique indexes treat NULLs as
+    # distinct, so ON CONFLICT alone would not catch keys with missing parts
+    ids.update(await select_ids(session, id_column, key_columns, list(pending)))
+
+    missing = [values for key, values in pending.items() if key not in ids]
+    if missing:
+        stmt = (
+            insert(model)
+            .values(missing)
+            .on_conflict_do_nothing()
+            .returning(id_column, *key_columns)
+        )
+        result = await session.execute(stmt)
+        ids.update({tuple(key): row_id for row_id, *key in result.all()})
+
+        conflicted = [key for key in pending if key not in ids]
+        if conflicted:
+            ids.update(await select_ids(session, id_column, key_columns, conflicted))
+
+    return ids
+
+
+def _build_listing_upsert():
+    """Build the listing upsert once; rows are bound as executemany parameters."""
+    table = Listing.__table__
+    stmt = insert(table)
+    update_columns = [
+        column.name for column in table.columns if column.name not in ("listing_id", "url")
+    ]
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.url],
+        set_={name: stmt.excluded[name] for name in update_columns},
     )
-    result = await session.execute(query)
-    existing = result.scalar_one_or_none()
-    if existing:
-        return existing
+
+
+# Core statement against the table: no ORM unit of work, and a single compiled
+# form is reused by every batch regardless of its size
+_LISTING_UPSERT = _build_listing_upsert()
+
+
+async def upsert_listings(session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Insert listings in bulk, updating the ones whose URL already exists."""
+    # With no parameter sets the statement would render as DEFAULT VALUES
+    if not rows:
+        return
+    await session.execute(_LISTING_UPSERT, rows)
+
+
+# Parser applied to each CSV column, in the order of the cleaned row
+COLUMN_PARSERS = (
+    ("locality", clean_string),
+    ("street", clean_string),
+    ("city_district", clean_string),
+    ("full_address", clean_string),
+    ("latitude", parse_decimal),
+    ("longitude", parse_decimal),
+    ("year_built", parse_int),
+    ("building_type", clean_string),
+    ("floor", parse_floor),
+    ("owner_type", clean_string),
+    ("rooms", parse_int),
+    ("area", parse_decimal),
+    ("price_total_zl", parse_decimal),
+    ("price_sqm_zl", parse_decimal),
+    ("price_per_sqm_detailed", parse_decimal),
+    ("date_posted", parse_date),
+    ("photo_count", parse_int),
+    ("url", clean_string),
+    ("image_url", clean_string),
+    ("description_text", clean_string),
+    ("has_basement", parse_boolean),
+    ("has_parking", parse_boolean),
+    ("kitchen_type", clean_string),
+    ("window_type", clean_string),
+    ("ownership_type", clean_string),
+    ("equipment", clean_string),
+)
+CSV_COLUMNS = tuple(name for name, _ in COLUMN_PARSERS)
+
+
+def csv_columns(header: List[str]) -> Dict[str, int]:
+    """
+    Map CSV column names to their position in a row.
+
+    Raises:
+        ValueError: If the header lacks any of CSV_COLUMNS
+    """
+    columns = {name.strip(): index for index, name in enumerate(header)}
+    missing = [name for name in CSV_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"CSV file is missing columns: {', '.join(missing)}")
+    return columns
+
+
+def clean_rows(
+    rows: List[List[str]],
+    columns: Dict[str, int],
+    today: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Clean and parse a batch of CSV rows column by column.
+
+    Every parser is mapped over its whole column at once (map/itemgetter iterate
+    in C) and the parsed columns are zipped back into one dict per row.
+
+    Args:
+        rows: Raw CSV rows, each with at least len(columns) values
+        columns: Header index from csv_columns
+        today: Reference date for relative dates (defaults to now)
+
+    Returns:
+        Cleaned rows keyed by CSV_COLUMNS
+    """
+    date_parser = partial(parse_date, today=today or datetime.now())
+    parsed_columns = [
+        map(
+            date_parser if parser is parse_date else parser,
+            map(itemgetter(columns[name]), rows),
+        )
+        for name, parser in COLUMN_PARSERS
+    ]
+    return [dict(zip(CSV_COLUMNS, values)) for values in zip(*parsed_columns)]
+
+
+def read_cleaned_batches(
+    csv_path: str, batch_size: int, stats: Dict[str, int]
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Read the CSV file and yield batches of cleaned rows.
+
+    This is blocking file I/O and parsing, meant to run in a worker thread.
+    Skipped and malformed rows are counted in stats.
+
+    Args:
+        csv_path: Path to CSV file
+        batch_size: Number of raw rows cleaned together
+        stats: Counters updated in place ("skipped", "errors")
+    """
+    with open(csv_path, "r", encoding="utf-8") as f:
+        # Plain reader: rows are lists indexed by position, no dict per row
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = csv_columns(header)
+        # Rows may end early; the missing trailing columns are read as empty
+        width = max(columns[name] for name in CSV_COLUMNS) + 1
+        # One reference time for relative dates across the whole file
+        today = datetime.now()
+        
+        rows = []
+        for row_num, row in enumerate(reader, start=2):  # Start at 2 (row 1 is header)
+            # Skip empty rows
+            if not any(row):
+                stats["skipped"] += 1
+                continue
+            
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            
+            rows.append((row_num, row))
+            if len(rows) >= batch_size:
+                yield _without_missing_urls(_clean_batch(rows, columns, today, stats), stats)
+                rows = []
+        
+        # Remaining rows
+        if rows:
+            yield _without_missing_urls(_clean_batch(rows, columns, today, stats), stats)
+
+
+def _clean_batch(
+    numbered_rows: List[Tuple[int, List[str]]],
+    columns: Dict[str, int],
+    today: datetime,
+    stats: Dict[str, int],
+) -> List[Dict[str, Any]]:
+    """
+    Clean a batch of (row number, row) pairs with clean_rows.
+
+    If a parser fails, the batch is cleaned again row by row so that only the
+    malformed rows are dropped; they are reported and counted in stats.
+    """
+    try:
+        return clean_rows([row for _, row in numbered_rows], columns, today)
+    except Exception:
+        pass
+
+    cleaned_rows = []
+    for row_num, row in numbered_rows:
+        try:
+            cleaned_rows.extend(clean_rows([row], columns, today))
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"Error processing row {row_num}: {e}")
+    return cleaned_rows
+
+
+def _without_missing_urls(
+    batch: List[Dict[str, Any]], stats: Dict[str, int]
+) -> List[Dict[str, Any]]:
+    """Drop rows without essential data, counting them as skipped."""
+    kept = [cleaned for cleaned in batch if cleaned["url"]]
+    stats["skipped"] += len(batch) - len(kept)
+    return kept
+
+
+async def produce_batches(
+    csv_path: str,
+    batch_size: int,
+    queue: asyncio.Queue,
+    stop: threading.Event,
+    stats: Dict[str, int],
+) -> None:
+    """Feed cleaned batches to the queue from a worker thread, then a None sentinel."""
+    loop = asyncio.get_running_loop()
     
-    # Create new features
-    features = Features(
-        has_basement=has_basement,
-        has_parking=has_parking,
-        kitchen_type=kitchen_type,
-        window_type=window_type,
-        ownership_type=ownership_type,
-        equipment=equipment,
-    )
-    session.add(features)
-    await session.flush()
-    return features
-
-
-def clean_row(row: Dict[str, str]) -> Dict[str, Any]:
-    """Clean and parse a single CSV row."""
-    return {
-        "locality": clean_string(row.get("locality")),
-        "street": clean_string(row.get("street")),
-        "city_district": clean_string(row.get("city_district")),
-        "full_address": clean_string(row.get("full_address")),
-        "latitude": parse_decimal(row.get("latitude")),
-        "longitude": parse_decimal(row.get("longitude")),
-        "year_built": parse_int(row.get("year_built")),
-        "building_type": clean_string(row.get("building_type")),
-        "floor": parse_floor(row.get("floor")),
-        "owner_type": clean_string(row.get("owner_type")),
-        "rooms": parse_int(row.get("rooms")),
-        "area": parse_decimal(row.get("area")),
-        "price_total_zl": parse_decimal(row.get("price_total_zl")),
-        "price_sqm_zl": parse_decimal(row.get("price_sqm_zl")),
-        "price_per_sqm_detailed": parse_decimal(row.get("price_per_sqm_detailed")),
-        "date_posted": parse_date(row.get("date_posted")),
-        "photo_count": parse_int(row.get("photo_count")),
-        "url": clean_string(row.get("url")),
-        "image_url": clean_string(row.get("image_url")),
-        "description_text": clean_string(row.get("description_text")),
-        "has_basement": parse_boolean(row.get("has_basement")),
-        "has_parking": parse_boolean(row.get("has_parking")),
-        "kitchen_type": clean_string(row.get("kitchen_type")),
-        "window_type": clean_string(row.get("window_type")),
-        "ownership_type": clean_string(row.get("ownership_type")),
-        "equipment": clean_string(row.get("equipment")),
-    }
+    def run() -> None:
+        for batch in read_cleaned_batches(csv_path, batch_size, stats):
+            if stop.is_set():
+                return
+            if batch:
+                # Blocks the worker thread (not the event loop) while the queue is full
+                asyncio.run_coroutine_threadsafe(queue.put(batch), loop).result()
+    
+    try:
+        await asyncio.to_thread(run)
+    finally:
+        await queue.put(None)
+
+
+async def consume_batches(
+    queue: asyncio.Queue,
+    stop: threading.Event,
+    caches: Dict[str, Dict[Tuple[Any, ...], int]],
+    stats: Dict[str, int],
+) -> None:
+    """Write queued batches to the database, committing after each one."""
+    async with async_session_maker() as session:
+        try:
+            while (batch := await queue.get()) is not None:
+                imported = await import_batch(session, batch, caches)
+                stats["imported"] += imported
+                stats["errors"] += len(batch) - imported
+                print(f"Processed {stats['imported']} listings...")
+        except Exception:
+            await session.rollback()
+            # Let the producer finish so it does not block on a full queue
+            stop.set()
+            while await queue.get() is not None:
+                pass
+            raise
 
 
 async def import_listings_from_csv(csv_path: str, batch_size: int = 100):
     """
     Import listings from CSV file to database.
     
+    Reading and cleaning the CSV runs in a worker thread and overlaps with the
+    database writes. There is a single writer because SQLite serializes writes.
+    
     Args:
         csv_path: Path to CSV file
         batch_size: Number of records to process in one transaction
     """
-    imported_count = 0
-    skipped_count = 0
-    error_count = 0
+    stats = {"imported": 0, "skipped": 0, "errors": 0}
+    # Related entity ids resolved so far, reused by every batch of this import
+    caches = new_id_caches()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+    stop = threading.Event()
     
-    async with async_session_maker() as session:
-        try:
-            with open(csv_path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                
-                batch = []
-                for row_num, row in enumerate(reader, start=2):  # Start at 2 (row 1 is header)
-                    try:
-                        # Skip empty rows
-                        if not any(row.values()):
-                            skipped_count += 1
-                            continue
-                        
-                        cleaned = clean_row(row)
-                        
-                        # Skip rows without essential data
-                        if not cleaned.get("url"):
-                            skipped_count += 1
-                            continue
-                        
-                        batch.append(cleaned)
-                        
-                        # Process batch when it reaches batch_size
-                        if len(batch) >= batch_size:
-                            processed = await process_batch(session, batch)
-                            imported_count += processed
-                            batch = []
-                            await session.commit()
-                            print(f"Processed {imported_count} listings...")
-                    
-                    except Exception as e:
-                        error_count += 1
-                        print(f"Error processing row {row_num}: {e}")
-                        continue
-                
-                # Process remaining batch
-                if batch:
-                    processed = await process_batch(session, batch)
-                    imported_count += processed
-                    await session.commit()
-            
-            print(f"\nImport completed:")
-            print(f"  Imported: {imported_count}")
-            print(f"  Skipped: {skipped_count}")
-            print(f"  Errors: {error_count}")
-        
-        except Exception as e:
-            await session.rollback()
-            print(f"Fatal error during import: {e}")
-            raise
+    try:
+        await asyncio.gather(
+            produce_batches(csv_path, batch_size, queue, stop, stats),
+            consume_batches(queue, stop, caches, stats),
+        )
+    except Exception as e:
+        print(f"Fatal error during import: {e}")
+        raise
+    
+    print(f"\nImport completed:")
+    print(f"  Imported: {stats['imported']}")
+    print(f"  Skipped: {stats['skipped']}")
+    print(f"  Errors: {stats['errors']}")
+
+
+async def process_batch(
+    session: AsyncSession,
+    batch: list,
+    caches: Optional[Dict[str, Dict[Tuple[Any, ...], int]]] = None,
+) -> int:
+    """
+    Process a batch of cleaned rows using a constant number of queries.
+
+    Args:
+        session: Database session
+        batch: Cleaned rows to import
+        caches: Per-table natural key -> id caches shared between batches,
+            keyed by table name (see new_id_caches)
+    """
+    if not batch:
+        return 0
+
+    caches = caches if caches is not None else new_id_caches()
+    location_ids = await resolve_ids(
+        session, Location, "location_id", LOCATION_KEY, batch, LOCATION_FIELDS,
+        cache=caches["location"],
+    )
+    building_ids = await resolve_ids(
+        session, Building, "building_id", BUILDING_KEY, batch, cache=caches["building"]
+    )
+    owner_ids = await resolve_ids(
+        session, Owner, "owner_id", OWNER_KEY, batch, cache=caches["owner"]
+    )
+    features_ids = await resolve_ids(
+        session, Features, "features_id", FEATURES_KEY, batch, cache=caches["features"]
+    )
 
+    # Key by URL so repeated listings within a batch collapse to the last occurrence
+    listings: Dict[str, Dict[str, Any]] = {}
+    for cleaned in batch:
+        listing = {field: cleaned[field] for field in LISTING_FIELDS}
+        listing["location_id"] = location_ids[natural_key(cleaned, LOCATION_KEY)]
+        listing["building_id"] = building_ids[natural_key(cleaned, BUILDING_KEY)]
+        listing["owner_id"] = owner_ids[natural_key(cleaned, OWNER_KEY)]
+        listing["features_id"] = features_ids[natural_key(cleaned, FEATURES_KEY)]
+        listings[cleaned["url"]] = listing
+
+    await upsert_listings(session, list(listings.values()))
+    return len(batch)
+
+
+def _cache_sizes(caches: Dict[str, Dict[Tuple[Any, ...], int]]) -> Dict[str, int]:
+    """Remember how many ids each cache holds, see _restore_caches."""
+    return {name: len(cache) for name, cache in caches.items()}
+
+
+def _restore_caches(
+    caches: Dict[str, Dict[Tuple[Any, ...], int]], sizes: Dict[str, int]
+) -> None:
+    """
+    Forget ids added since _cache_sizes was taken.
+
+    Their rows were rolled back, so later batches must not reference them.
+    Caches only grow by insertion, so the newest entries are the ones to drop.
+    """
+    for name, size in sizes.items():
+        cache = caches[name]
+        for key in list(islice(reversed(cache), len(cache) - size)):
+            del cache[key]
+
+
+async def import_batch(
+    session: AsyncSession,
+    batch: List[Dict[str, Any]],
+    caches: Dict[str, Dict[Tuple[Any, ...], int]],
+) -> int:
+    """
+    Write a batch with process_batch and commit it.
+
+    If the batch fails, it is rolled back and retried one row per transaction,
+    so a malformed row is reported and skipped instead of aborting the import.
+
+    Args:
+        session: Database session, with no pending changes
+        batch: Cleaned rows to import
+        caches: Per-table natural key -> id caches shared between batches
+
+    Returns:
+        Number of rows imported
+    """
+    sizes = _cache_sizes(caches)
+    try:
+        imported = await process_batch(session, batch, caches)
+        await session.commit()
+        return imported
+    except Exception as e:
+        await session.rollback()
+        _restore_caches(caches, sizes)
+        if len(batch) == 1:
+            print(f"Error processing listing {batch[0]['url']}: {e}")
+            return 0
 
-async def process_batch(session: AsyncSession, batch: list) -> int:
-    """Process a batch of cleaned rows."""
     imported = 0
-    
     for cleaned in batch:
-        try:
-            # Get or create related entities
-            location = await get_or_create_location(
-                session,
-                cleaned["locality"],
-                cleaned["street"],
-                cleaned["city_district"],
-                cleaned["full_address"],
-                cleaned["latitude"],
-                cleaned["longitude"],
-            )
-            
-            building = await get_or_create_building(
-                session,
-                cleaned["year_built"],
-                cleaned["building_type"],
-                cleaned["floor"],
-            )
-            
-            owner = await get_or_create_owner(
-                session,
-                cleaned["owner_type"],
-            )
-            
-            features = await get_or_create_features(
-                session,
-                cleaned["has_basement"],
-                cleaned["has_parking"],
-                cleaned["kitchen_type"],
-                cleaned["window_type"],
-                cleaned["ownership_type"],
-                cleaned["equipment"],
-            )
-            
-            # Check if listing with same URL already exists
-            existing_query = select(Listing).where(Listing.url == cleaned["url"])
-            result = await session.execute(existing_query)
-            existing_listing = result.scalar_one_or_none()
-            
-            if existing_listing:
-                # Update existing listing
-                existing_listing.location_id = location.location_id
-                existing_listing.building_id = building.building_id
-                existing_listing.owner_id = owner.owner_id
-                existing_listing.features_id = features.features_id
-                existing_listing.rooms = cleaned["rooms"]
-                existing_listing.area = cleaned["area"]
-                existing_listing.price_total_zl = cleaned["price_total_zl"]
-                existing_listing.price_sqm_zl = cleaned["price_sqm_zl"]
-                existing_listing.price_per_sqm_detailed = cleaned["price_per_sqm_detailed"]
-                existing_listing.date_posted = cleaned["date_posted"]
-                existing_listing.photo_count = cleaned["photo_count"]
-                existing_listing.image_url = cleaned["image_url"]
-                existing_listing.description_text = cleaned["description_text"]
-            else:
-                # Create new listing
-                listing = Listing(
-                    location_id=location.location_id,
-                    building_id=building.building_id,
-                    owner_id=owner.owner_id,
-                    features_id=features.features_id,
-                    rooms=cleaned["rooms"],
-                    area=cleaned["area"],
-                    price_total_zl=cleaned["price_total_zl"],
-                    price_sqm_zl=cleaned["price_sqm_zl"],
-                    price_per_sqm_detailed=cleaned["price_per_sqm_detailed"],
-                    date_posted=cleaned["date_posted"],
-                    photo_count=cleaned["photo_count"],
-                    url=cleaned["url"],
-                    image_url=cleaned["image_url"],
-                    description_text=cleaned["description_text"],
-                )
-                session.add(listing)
-            
-            imported += 1
-        
-        except Exception as e:
-            print(f"Error processing listing: {e}")
-            continue
-    
+        imported += await import_batch(session, [cleaned], caches)
     return imported
 
 
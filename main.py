@@ -1,9 +1,13 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from models.database import engine
 from routers import health, hello, offers
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -11,8 +15,18 @@ async def lifespan(app: FastAPI):
     from models.base import Base
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Health probes are answered from a background check instead of the database
+    pinger = asyncio.create_task(health.run_health_pinger())
     yield
-    # Shutdown: Close database connections
+    # Shutdown: Stop the pinger and close database connections
+    pinger.cancel()
+    try:
+        await pinger
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        # A pinger that died earlier must not abort shutdown
+        logger.exception("Health pinger stopped with an error")
     await engine.dispose()
 
 
@@ -1,28 +1,56 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .base import Base
 
 # SQLite connection string
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./sql_app.db"
 
-# Async engine for SQLite
+# Async engine for SQLite; connections are pooled and reused across requests
+# instead of reopening the database file for every session
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=True,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=5,
+    max_overflow=10,
+    pool_recycle=3600,
+    pool_pre_ping=False,
+    connect_args={"check_same_thread": False, "timeout": 30},
 )
 
-# Async session factory
+# Per-connection SQLite tuning: WAL lets readers run alongside the writer,
+# synchronous=NORMAL is durable enough under WAL and avoids an fsync per commit,
+# and a larger page cache / mmap keeps hot pages in memory. The lock wait is
+# not set here: the driver's timeout connect arg already sets busy_timeout
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLITE_PRAGMAS to every new DBAPI connection."""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+# Async session factory; nothing here relies on autoflush (reads are Core
+# column selects and the import writes with Core statements)
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
+    autoflush=False,
 )
 
 
 async def get_db() -> AsyncSession:
     async with async_session_maker() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
 
@@ -4,12 +4,21 @@ from datetime import date
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import Column, Numeric, String, Boolean, Text, Date, SmallInteger, Integer
+from sqlalchemy import (
+    Column, Numeric, String, Boolean, Text, Date, SmallInteger, Integer, Index,
+    func, literal_column,
+)
 from sqlmodel import Field, SQLModel
 
+from .types import ScaledDecimal
+
 
 class Location(SQLModel, table=True):
     __tablename__ = "location"
+    # Natural keys of the related tables let the CSV import deduplicate rows
+    __table_args__ = (
+        Index("ix_location_natural_key", "locality", "street", "full_address", unique=True),
+    )
 
     location_id: Optional[int] = Field(default=None, primary_key=True)
     city: Optional[str] = Field(default=None, sa_column=Column(String(255)))
@@ -25,6 +34,9 @@ class Location(SQLModel, table=True):
 
 class Building(SQLModel, table=True):
     __tablename__ = "building"
+    __table_args__ = (
+        Index("ix_building_natural_key", "year_built", "building_type", "floor", unique=True),
+    )
 
     building_id: Optional[int] = Field(default=None, primary_key=True)
     year_built: Optional[int] = Field(default=None, sa_column=Column(SmallInteger))
@@ -36,6 +48,7 @@ class Building(SQLModel, table=True):
 
 class Owner(SQLModel, table=True):
     __tablename__ = "owner"
+    __table_args__ = (Index("ix_owner_natural_key", "owner_type", unique=True),)
 
     owner_id: Optional[int] = Field(default=None, primary_key=True)
     owner_type: Optional[str] = Field(default=None, sa_column=Column(String(50)))
@@ -48,6 +61,18 @@ class Owner(SQLModel, table=True):
 
 class Features(SQLModel, table=True):
     __tablename__ = "features"
+    __table_args__ = (
+        Index(
+            "ix_features_natural_key",
+            "has_basement",
+            "has_parking",
+            "kitchen_type",
+            "window_type",
+            "ownership_type",
+            "equipment",
+            unique=True,
+        ),
+    )
 
     features_id: Optional[int] = Field(default=None, primary_key=True)
     has_basement: Optional[bool] = Field(default=None, sa_column=Column(Boolean))
@@ -62,6 +87,14 @@ class Features(SQLModel, table=True):
 
 class Listing(SQLModel, table=True):
     __tablename__ = "listing"
+    # Unique URL lets the CSV import upsert listings with ON CONFLICT (url);
+    # the remaining indexes serve the ORDER BY of GET /offers
+    __table_args__ = (
+        Index("ix_listing_url", "url", unique=True),
+        Index("ix_listing_price_total_zl", "price_total_zl"),
+        Index("ix_listing_area", "area"),
+        Index("ix_listing_date_posted", "date_posted"),
+    )
 
     listing_id: Optional[int] = Field(default=None, primary_key=True)
     location_id: int = Field(foreign_key="location.location_id")
@@ -69,11 +102,12 @@ class Listing(SQLModel, table=True):
     owner_id: int = Field(foreign_key="owner.owner_id")
     features_id: int = Field(foreign_key="features.features_id")
     rooms: Optional[int] = Field(default=None, sa_column=Column(SmallInteger))
-    area: Optional[Decimal] = Field(default=None, sa_column=Column(Numeric(6, 2)))
-    price_total_zl: Optional[Decimal] = Field(default=None, sa_column=Column(Numeric(12, 2)))
-    price_sqm_zl: Optional[Decimal] = Field(default=None, sa_column=Column(Numeric(12, 2)))
+    # Stored as integer hundredths (grosze, 0.01 m2) and exposed as Decimal
+    area: Optional[Decimal] = Field(default=None, sa_column=Column(ScaledDecimal(2)))
+    price_total_zl: Optional[Decimal] = Field(default=None, sa_column=Column(ScaledDecimal(2)))
+    price_sqm_zl: Optional[Decimal] = Field(default=None, sa_column=Column(ScaledDecimal(2)))
     price_per_sqm_detailed: Optional[Decimal] = Field(
-        default=None, sa_column=Column(Numeric(12, 2))
+        default=None, sa_column=Column(ScaledDecimal(2))
     )
     date_posted: Optional[date] = Field(default=None, sa_column=Column(Date))
     photo_count: Optional[int] = Field(default=None, sa_column=Column(Integer))
@@ -81,3 +115,15 @@ class Listing(SQLModel, table=True):
     image_url: Optional[str] = Field(default=None, sa_column=Column(Text))
     description_text: Optional[str] = Field(default=None, sa_column=Column(Text))
 
+
+# Price per square meter used for sorting offers, in stored (grosze) units: the
+# listed value, or the total price divided by the area when it is missing; both
+# operands are scaled by 100, so the quotient is multiplied back by 100. The
+# numbers are literals rather than bound parameters so that queries match the
+# expression index below
+listing_price_per_sqm = func.coalesce(
+    Listing.__table__.c.price_sqm_zl,
+    Listing.__table__.c.price_total_zl * literal_column("100")
+    / func.nullif(Listing.__table__.c.area, literal_column("0")),
+)
+Index("ix_listing_price_per_sqm", listing_price_per_sqm)
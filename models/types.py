@@ -0,0 +1,43 @@
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Optional
+
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+
+class ScaledDecimal(TypeDecorator):
+    """
+    Decimal value stored as an INTEGER count of 10**-scale units.
+
+    Prices are kept in grosze and areas in hundredths of a square meter, so
+    SQLite compares plain integers and reading a row builds the Decimal from an
+    int instead of going through a float.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def __init__(self, scale: int = 2):
+        """Store values as integer multiples of 10**-scale (hundredths for scale=2)."""
+        super().__init__()
+        self.scale = scale
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[int]:
+        """
+        Convert a value to its integer count of 10**-scale units.
+
+        Digits beyond the scale are rounded half up, e.g. 12.345 binds as 1235
+        for scale=2.
+        """
+        if value is None:
+            return None
+        if not isinstance(value, Decimal):
+            # Via str so that floats keep their shortest decimal representation
+            value = Decimal(str(value))
+        return int(value.scaleb(self.scale).to_integral_value(rounding=ROUND_HALF_UP))
+
+    def process_result_value(self, value: Any, dialect) -> Optional[Decimal]:
+        """Convert a stored integer back to a Decimal with scale fractional digits."""
+        if value is None:
+            return None
+        return Decimal(value).scaleb(-self.scale)
@@ -1,15 +1,75 @@
+import asyncio
+import time
 from datetime import datetime, UTC
-from typing import Annotated
+from typing import Annotated, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy import text
 
-from models.database import get_db
+from models.database import async_session_maker, get_db
 from schemas.health import HealthResponse, HealthStatus
 
 router = APIRouter(prefix="/health")
 
+# A healthy result is reused for this many seconds, so a burst of probes runs
+# a single SELECT 1; unhealthy results are never cached
+HEALTH_CACHE_TTL = 1.0
+
+# How often the background pinger started by the app checks the database
+HEALTH_PING_INTERVAL = 5.0
+
+_cached_health: Optional[Tuple[float, HealthResponse]] = None
+
+
+def clear_health_cache() -> None:
+    """Forget the cached healthy result so the next check queries the database."""
+    global _cached_health
+    _cached_health = None
+
+
+async def _check_database(db: AsyncSession) -> HealthResponse:
+    """Run SELECT 1 and describe the outcome as a HealthResponse."""
+    try:
+        # Check the database connection
+        result = await db.execute(text("SELECT 1"))
+        result.scalar()
+        database_status = "connected"
+        overall_status = HealthStatus.healthy
+    except Exception as e:
+        database_status = f"error: {str(e)}"
+        overall_status = HealthStatus.unhealthy
+    
+    return HealthResponse(
+        status=overall_status,
+        timestamp=datetime.now(UTC),
+        database=database_status,
+    )
+
+
+async def run_health_pinger(
+    session_maker: async_sessionmaker = async_session_maker,
+    interval: float = HEALTH_PING_INTERVAL,
+) -> None:
+    """
+    Check the database every interval seconds and publish the result.
+    
+    While the pinger runs, health_check answers from its latest result
+    (healthy or not) without touching the database. Each result is kept for
+    two intervals, so if the pinger stops the endpoint goes back to checking
+    the database itself.
+    
+    Args:
+        session_maker: Factory for the sessions used to ping the database
+        interval: Seconds between checks
+    """
+    global _cached_health
+    while True:
+        async with session_maker() as db:
+            response = await _check_database(db)
+        _cached_health = (time.monotonic() + 2 * interval, response)
+        await asyncio.sleep(interval)
+
 
 @router.get(
     "/",
@@ -28,19 +88,12 @@ async def health_check(
     - timestamp: timestamp of the check
     - database: status of the database connection
     """
-    try:
-        # Check the database connection
-        result = await db.execute(text("SELECT 1"))
-        result.scalar()
-        database_status = "connected"
-        overall_status = HealthStatus.healthy
-    except Exception as e:
-        database_status = f"error: {str(e)}"
-        overall_status = HealthStatus.unhealthy
+    global _cached_health
+    now = time.monotonic()
+    if _cached_health is not None and now < _cached_health[0]:
+        return _cached_health[1]
     
-    return HealthResponse(
-        status=overall_status,
-        timestamp=datetime.now(UTC),
-        database=database_status,
-    )
-
+    response = await _check_database(db)
+    if response.status == HealthStatus.healthy:
+        _cached_health = (now + HEALTH_CACHE_TTL, response)
+    return response
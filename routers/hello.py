@@ -1,9 +1,20 @@
+from functools import lru_cache
+
 from fastapi import APIRouter
 
 from schemas.hello import HelloResponse
 
 router = APIRouter()
 
+# The response never changes, so it is built once at import
+HELLO_WORLD = HelloResponse(message="Hello World")
+
+
+@lru_cache(maxsize=1024)
+def _greeting(name: str) -> HelloResponse:
+    """Build (and memoize) the greeting for a name."""
+    return HelloResponse(message=f"Hello {name}")
+
 
 @router.get(
     "/hello",
@@ -18,7 +29,7 @@ async def hello_world() -> HelloResponse:
     Returns:
         HelloResponse: Hello World message
     """
-    return HelloResponse(message="Hello World")
+    return HELLO_WORLD
 
 
 @router.get(
@@ -37,5 +48,5 @@ async def hello(name: str) -> HelloResponse:
     Returns:
         HelloResponse: Greeting message with the name
     """
-    return HelloResponse(message=f"Hello {name}")
+    return _greeting(name)
 
@@ -1,17 +1,121 @@
-from typing import Annotated, List
+import os
+import time
+from collections import OrderedDict
+from typing import Annotated, List, Optional, Tuple
 from fastapi import APIRouter, Depends, Query
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from decimal import Decimal
+from sqlalchemy import Float, bindparam, func, literal_column, select, type_coerce
 
 from models.database import get_db
-from models.models import Listing
+from models.models import Listing, listing_price_per_sqm
 from schemas.offers import OfferResponse, OffersListResponse
-from utils.sorter import OfferSorter
+from utils.sorter import SortOption
 
 
 router = APIRouter()
 
+# ORDER BY clauses matching OfferSorter: missing values sort last when ascending
+# and first when descending (the sorter substitutes a maximum for them), and
+# ties are broken by listing_id like the stable sort over table order
+_ORDER_BY = {
+    SortOption.PRICE_ASC.value: Listing.price_total_zl.asc().nulls_last(),
+    SortOption.PRICE_DESC.value: Listing.price_total_zl.desc().nulls_first(),
+    SortOption.PRICE_PER_SQM_ASC.value: listing_price_per_sqm.asc().nulls_last(),
+    SortOption.PRICE_PER_SQM_DESC.value: listing_price_per_sqm.desc().nulls_first(),
+    SortOption.DATE_NEWEST.value: Listing.date_posted.desc().nulls_last(),
+    SortOption.AREA_ASC.value: Listing.area.asc().nulls_last(),
+    SortOption.AREA_DESC.value: Listing.area.desc().nulls_first(),
+}
+
+
+def _as_float(column):
+    """Read an integer-hundredths column as a float computed by SQLite."""
+    return type_coerce(column, Float) / literal_column("100.0")
+
+
+# Only the columns OfferResponse needs are selected, so rows skip ORM entity
+# loading and the identity map. Amounts are divided in SQL, so rows carry
+# plain floats and no Decimal is built per value
+_OFFER_COLUMNS = (
+    Listing.listing_id,
+    _as_float(Listing.price_total_zl).label("price_total_zl"),
+    _as_float(Listing.price_sqm_zl).label("price_sqm_zl"),
+    _as_float(Listing.area).label("area"),
+    Listing.rooms,
+    Listing.date_posted,
+)
+
+# Validates a whole page of rows (read by attribute) in one pydantic-core call
+_OFFERS_ADAPTER = TypeAdapter(List[OfferResponse])
+
+# Evaluated once per statement by SQLite, so the page and the total come back
+# in one round trip while the ORDER BY can still be served from an index
+_TOTAL_COUNT = select(func.count()).select_from(Listing).scalar_subquery()
+
+# SQLite treats a negative LIMIT as no limit
+_NO_LIMIT = -1
+
+# Upper bounds for the page parameters. The limit caps the size of a page;
+# the offset cap is the largest signed 64-bit SQLite INTEGER, above which
+# binding the value fails with OverflowError
+MAX_OFFERS_LIMIT = 1000
+MAX_OFFERS_OFFSET = 2**63 - 1
+
+
+def _offers_query(*order_by):
+    """Build the offers page statement; limit and offset are bound per request."""
+    return (
+        select(*_OFFER_COLUMNS, _TOTAL_COUNT.label("total"))
+        .order_by(*order_by, Listing.listing_id)
+        .limit(bindparam("limit"))
+        .offset(bindparam("offset"))
+    )
+
+
+# One prebuilt statement per sort option, so requests skip rebuilding the
+# select and regenerating its cache key; the default (najtrafniejsze) keeps
+# table order
+_OFFERS_QUERIES = {option: _offers_query(order_by) for option, order_by in _ORDER_BY.items()}
+_DEFAULT_OFFERS_QUERY = _offers_query()
+_TOTAL_QUERY = select(_TOTAL_COUNT)
+
+# Responses are reused for OFFERS_CACHE_TTL seconds, so repeated identical
+# requests skip the database. Listings are only written by the CSV import,
+# which runs in a separate process, so the TTL bounds how stale a page can be;
+# it is read from the environment and 0 disables the cache
+OFFERS_CACHE_TTL = float(os.environ.get("OFFERS_CACHE_TTL", "30"))
+
+# Only bounded pages near the start of the list are cached: the key is chosen
+# by the client, so unlimited pages and deep offsets would let it fill memory
+# with rarely repeated responses. The cache is also bounded by the number of
+# offers held across all entries, evicting the least recently used first
+OFFERS_CACHE_MAX_OFFSET = 10 * MAX_OFFERS_LIMIT
+OFFERS_CACHE_MAX_ROWS = 100_000
+
+_offers_cache: "OrderedDict[Tuple, Tuple[float, OffersListResponse]]" = OrderedDict()
+_offers_cache_rows = 0
+
+
+def clear_offers_cache() -> None:
+    """Drop all cached offers responses."""
+    global _offers_cache_rows
+    _offers_cache.clear()
+    _offers_cache_rows = 0
+
+
+def _cache_offers_response(cache_key: Tuple, expires: float, response: OffersListResponse) -> None:
+    """Store a response, evicting the oldest ones beyond OFFERS_CACHE_MAX_ROWS."""
+    global _offers_cache_rows
+    replaced = _offers_cache.pop(cache_key, None)
+    if replaced is not None:
+        _offers_cache_rows -= len(replaced[1].offers)
+    _offers_cache[cache_key] = (expires, response)
+    _offers_cache_rows += len(response.offers)
+    while _offers_cache_rows > OFFERS_CACHE_MAX_ROWS:
+        _, (_, evicted) = _offers_cache.popitem(last=False)
+        _offers_cache_rows -= len(evicted.offers)
+
 
 def _convert_sort_params(sort_by: str, order: str) -> str:
     """
@@ -61,52 +165,57 @@ def _convert_sort_params(sort_by: str, order: str) -> str:
 async def get_offers(
     sort_by: str = Query(default="najtrafniejsze", description="Field to sort by (price, price_per_sqm, date, area)"),
     order: str = Query(default="asc", description="Sort order (asc or desc)"),
+    limit: Optional[int] = Query(
+        default=None, ge=1, le=MAX_OFFERS_LIMIT, description="Maximum number of offers to return"
+    ),
+    offset: int = Query(
+        default=0, ge=0, le=MAX_OFFERS_OFFSET, description="Number of offers to skip"
+    ),
     db: Annotated[AsyncSession, Depends(get_db)] = ...,
 ) -> OffersListResponse:
     """
     Get offers/listings with optional sorting.
     
+    Sorting and pagination are done by the database, using the indexes on the
+    sortable listing columns.
+    
     Args:
         sort_by: Field to sort by. Options: "price", "price_per_sqm", "date", "area", or "najtrafniejsze" (default)
         order: Sort order. Options: "asc" (ascending) or "desc" (descending). Default: "asc"
+        limit: Maximum number of offers to return, at most MAX_OFFERS_LIMIT. Default: all offers
+        offset: Number of offers to skip, at most MAX_OFFERS_OFFSET (2**63 - 1,
+            the SQLite INTEGER maximum). Default: 0
         db: Database session dependency
     
     Returns:
-        OffersListResponse: List of offers with total count
+        OffersListResponse: Page of offers with the total count of all offers
     """
-    # Query all listings from database
-    result = await db.execute(select(Listing))
-    listings = result.scalars().all()
-    
-    # Convert SQLModel instances to dictionaries for OfferSorter
-    offers_dict = []
-    for listing in listings:
-        offer_dict = {
-            "listing_id": listing.listing_id,
-            "price_total_zl": listing.price_total_zl,
-            "price_sqm_zl": listing.price_sqm_zl,
-            "area": listing.area,
-            "rooms": listing.rooms,
-            "date_posted": listing.date_posted,
-        }
-        offers_dict.append(offer_dict)
-    
-    # Handle default sorting (najtrafniejsze)
-    if sort_by == "najtrafniejsze":
-        sort_option = None
-    else:
-        # Convert sort_by and order to OfferSorter format
-        sort_option = _convert_sort_params(sort_by, order)
+    sort_option = None if sort_by == "najtrafniejsze" else _convert_sort_params(sort_by, order)
     
-    # Sort offers using OfferSorter
-    sorter = OfferSorter()
-    sorted_offers = sorter.sort(offers_dict, sort_by=sort_option)
+    cacheable = OFFERS_CACHE_TTL > 0 and limit is not None and offset <= OFFERS_CACHE_MAX_OFFSET
+    cache_key = (sort_option, limit, offset)
+    now = time.monotonic()
+    cached = _offers_cache.get(cache_key) if cacheable else None
+    if cached is not None and now < cached[0]:
+        _offers_cache.move_to_end(cache_key)
+        return cached[1]
     
-    # Convert dictionaries to Pydantic models
-    offer_responses = [OfferResponse(**offer) for offer in sorted_offers]
+    query = _DEFAULT_OFFERS_QUERY if sort_option is None else _OFFERS_QUERIES[sort_option]
+    params = {"limit": _NO_LIMIT if limit is None else limit, "offset": offset}
+    rows = (await db.execute(query, params)).all()
     
-    return OffersListResponse(
+    if rows:
+        total = rows[0].total
+    else:
+        # Past the last page there is no row to carry the total
+        total = (await db.execute(_TOTAL_QUERY)).scalar_one()
+    
+    offer_responses = _OFFERS_ADAPTER.validate_python(rows, from_attributes=True)
+    
+    response = OffersListResponse(
         offers=offer_responses,
-        total=len(offer_responses)
+        total=total
     )
-
+    if cacheable:
+        _cache_offers_response(cache_key, now + OFFERS_CACHE_TTL, response)
+    return response
@@ -1,30 +1,33 @@
 from datetime import date
-from decimal import Decimal
 from typing import List, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
 
+# Shared by both models' schema examples
+_OFFER_EXAMPLE = {
+    "listing_id": 1,
+    "price_total_zl": 500000.0,
+    "price_sqm_zl": 10000.0,
+    "area": 50.0,
+    "rooms": 3,
+    "date_posted": "2024-01-15",
+}
+
+
 class OfferResponse(BaseModel):
     """Response model for a single offer/listing."""
     model_config = ConfigDict(
         from_attributes=True,
-        json_schema_extra={
-            "example": {
-                "listing_id": 1,
-                "price_total_zl": "500000.00",
-                "price_sqm_zl": "10000.00",
-                "area": "50.00",
-                "rooms": 3,
-                "date_posted": "2024-01-15",
-            }
-        }
+        json_schema_extra={"example": _OFFER_EXAMPLE},
     )
     
     listing_id: Optional[int] = Field(None, description="Unique identifier for the listing")
-    price_total_zl: Optional[Decimal] = Field(None, description="Total price in PLN")
-    price_sqm_zl: Optional[Decimal] = Field(None, description="Price per square meter in PLN")
-    area: Optional[Decimal] = Field(None, description="Area in square meters")
+    # Plain floats: the values are only rendered, and float validation and
+    # serialization are much cheaper than Decimal
+    price_total_zl: Optional[float] = Field(None, description="Total price in PLN")
+    price_sqm_zl: Optional[float] = Field(None, description="Price per square meter in PLN")
+    area: Optional[float] = Field(None, description="Area in square meters")
     rooms: Optional[int] = Field(None, description="Number of rooms")
     date_posted: Optional[date] = Field(None, description="Date when the listing was posted")
 
@@ -34,16 +37,7 @@ class OffersListResponse(BaseModel):
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
-                "offers": [
-                    {
-                        "listing_id": 1,
-                        "price_total_zl": "500000.00",
-                        "price_sqm_zl": "10000.00",
-                        "area": "50.00",
-                        "rooms": 3,
-                        "date_posted": "2024-01-15",
-                    }
-                ],
+                "offers": [_OFFER_EXAMPLE],
                 "total": 1
             }
         }
@@ -13,25 +13,46 @@ from pathlib import Path
 import tempfile
 import os
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.pool import StaticPool
 from httpx import AsyncClient, ASGITransport
 from fastapi.testclient import TestClient
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 from models.base import Base
 from models.database import get_db
 from main import app
+from routers import health, offers
+from tests.helpers import override_dependency
 
 
 # Test database URL - using in-memory SQLite for faster tests
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
-@pytest.fixture(scope="function")
+if uvloop is not None:
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests and fixtures on uvloop, like uvicorn does in production."""
+        return {"uvloop": uvloop.new_event_loop}
+
+
+@pytest.fixture(scope="session")
 async def test_engine():
     """
     Create a test database engine with in-memory SQLite.
-    Each test function gets a fresh database.
+    The schema is created once and shared by the whole test session; every
+    test runs inside its own transaction (see test_connection), so tests
+    still start from an empty database.
     """
     engine = create_async_engine(
         TEST_DATABASE_URL,
@@ -40,6 +61,16 @@ async def test_engine():
         echo=False,  # Set to True for SQL query debugging
     )
     
+    # pysqlite's own transaction handling breaks SAVEPOINTs, so let
+    # SQLAlchemy emit BEGIN itself
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
     # Create all tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -51,15 +82,28 @@ async def test_engine():
 
 
 @pytest.fixture(scope="function")
-async def test_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
+async def test_connection(test_engine) -> AsyncGenerator[AsyncConnection, None]:
+    """
+    Open a connection with an outer transaction that is rolled back after
+    the test, discarding everything the test wrote.
+    """
+    async with test_engine.connect() as conn:
+        transaction = await conn.begin()
+        yield conn
+        await transaction.rollback()
+
+
+@pytest.fixture(scope="function")
+async def test_session(test_connection) -> AsyncGenerator[AsyncSession, None]:
     """
     Create a test database session.
     Each test gets a fresh session that is rolled back after the test.
     """
     async_session_maker = async_sessionmaker(
-        test_engine,
+        test_connection,
         class_=AsyncSession,
         expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
     )
     
     async with async_session_maker() as session:
@@ -68,15 +112,17 @@ async def test_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
 
 
 @pytest.fixture(scope="function")
-async def test_session_with_commit(test_engine) -> AsyncGenerator[AsyncSession, None]:
+async def test_session_with_commit(test_connection) -> AsyncGenerator[AsyncSession, None]:
     """
     Create a test database session that commits changes.
-    Use this when you need to test committed transactions.
+    Use this when you need to test committed transactions; commits release
+    a SAVEPOINT, so the data is still gone after the test.
     """
     async_session_maker = async_sessionmaker(
-        test_engine,
+        test_connection,
         class_=AsyncSession,
         expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
     )
     
     async with async_session_maker() as session:
@@ -96,35 +142,48 @@ def override_get_db(test_session):
     return _get_test_db
 
 
+@pytest.fixture(scope="session")
+def asgi_transport() -> ASGITransport:
+    """
+    ASGI transport shared by all async test clients.
+    The app keeps no per-test state besides dependency_overrides, which the
+    client fixtures set and clear themselves.
+    """
+    return ASGITransport(app=app)
+
+
 @pytest.fixture(scope="function")
-async def test_client(override_get_db) -> AsyncGenerator[AsyncClient, None]:
+async def test_client(asgi_transport, override_get_db) -> AsyncGenerator[AsyncClient, None]:
     """
     Create a FastAPI test client with overridden database dependency.
     Use this for testing API endpoints.
     """
-    app.dependency_overrides[get_db] = override_get_db
-    
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as client:
-        yield client
-    
-    # Cleanup: remove dependency override after test
-    app.dependency_overrides.clear()
+    with override_dependency(get_db, override_get_db):
+        async with AsyncClient(transport=asgi_transport, base_url="http://test") as client:
+            yield client
 
 
 @pytest.fixture(scope="function")
-async def test_client_no_db() -> AsyncGenerator[AsyncClient, None]:
+async def test_client_no_db(asgi_transport) -> AsyncGenerator[AsyncClient, None]:
     """
     Create a FastAPI test client without database dependency override.
     Use this for testing endpoints that don't require database access.
     """
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as client:
+    async with AsyncClient(transport=asgi_transport, base_url="http://test") as client:
         yield client
 
 
+@pytest.fixture(scope="module")
+def shared_sync_test_client() -> TestClient:
+    """
+    One synchronous FastAPI TestClient per test module.
+    The app sets no cookies, so nothing carries over between tests.
+    """
+    return TestClient(app)
+
+
 @pytest.fixture(scope="function")
-async def sync_test_client(override_get_db) -> TestClient:
+async def sync_test_client(shared_sync_test_client, override_get_db) -> TestClient:
     """
     Create a synchronous FastAPI TestClient with overridden database dependency.
     Use this for testing API endpoints with FastAPI's TestClient.
@@ -132,11 +191,18 @@ async def sync_test_client(override_get_db) -> TestClient:
     Note: TestClient is synchronous but works with async endpoints.
     The fixture is async to ensure the test_session is properly set up.
     """
-    app.dependency_overrides[get_db] = override_get_db
-    
-    client = TestClient(app)
-    yield client
-    
-    # Cleanup: remove dependency override after test
-    app.dependency_overrides.clear()
+    with override_dependency(get_db, override_get_db):
+        yield shared_sync_test_client
 
+
+@pytest.fixture(autouse=True)
+def reset_response_caches():
+    """
+    Clear the cached health check and offers responses around every test,
+    so each test sees the database state it set up.
+    """
+    health.clear_health_cache()
+    offers.clear_offers_cache()
+    yield
+    health.clear_health_cache()
+    offers.clear_offers_cache()
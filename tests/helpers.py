@@ -0,0 +1,17 @@
+"""
+Plain helpers shared by the test modules and fixtures.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from main import app
+
+
+@contextmanager
+def override_dependency(dependency: Callable, override: Callable) -> Iterator[None]:
+    """Replace a FastAPI dependency of the app for the duration of the block."""
+    app.dependency_overrides[dependency] = override
+    try:
+        yield
+    finally:
+        app.dependency_overrides.pop(dependency, None)
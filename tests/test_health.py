@@ -1,17 +1,21 @@
 """
 Tests for health check endpoint.
 """
+import asyncio
 import pytest
+from contextlib import suppress
 from datetime import datetime, UTC
 from typing import AsyncGenerator
-from httpx import AsyncClient
+from httpx import AsyncClient, ASGITransport
 from unittest.mock import AsyncMock
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from schemas.health import HealthStatus
 from models.database import get_db
 from main import app
+from routers import health
+from tests.helpers import override_dependency
 
 
 @pytest.mark.asyncio
@@ -113,3 +117,43 @@ async def test_health_check_database_error(override_get_db_with_error):
         # Cleanup
         app.dependency_overrides.clear()
 
+
+@pytest.mark.asyncio
+async def test_health_check_reuses_healthy_result(test_client: AsyncClient):
+    """Test that a healthy result is served from cache within the TTL."""
+    first = await test_client.get("/health/")
+    second = await test_client.get("/health/")
+    
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["status"] == HealthStatus.healthy
+    assert second.json()["timestamp"] == first.json()["timestamp"]
+
+
+@pytest.mark.asyncio
+async def test_health_check_served_from_pinger(test_engine, override_get_db_with_error):
+    """Test that while the background pinger runs the endpoint does not query the database."""
+    session_maker = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    pinger = asyncio.create_task(health.run_health_pinger(session_maker, interval=60))
+    
+    try:
+        with override_dependency(get_db, override_get_db_with_error):
+            await asyncio.wait_for(_wait_for_cached_health(), timeout=2)
+            
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.get("/health/")
+        
+        # The failing session is never used, the pinger's result is returned
+        assert response.status_code == 200
+        assert response.json()["status"] == HealthStatus.healthy
+        assert response.json()["database"] == "connected"
+    finally:
+        pinger.cancel()
+        with suppress(asyncio.CancelledError):
+            await pinger
+
+
+async def _wait_for_cached_health() -> None:
+    """Wait until the pinger has published its first result."""
+    while health._cached_health is None:
+        await asyncio.sleep(0)
@@ -0,0 +1,176 @@
+"""
+Tests for the CSV listings import.
+
+Batches of cleaned rows are written with process_batch, which resolves the
+related entities by natural key and upserts the listings by URL.
+"""
+import csv
+import pytest
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import import_listings
+from import_listings import (
+    CSV_COLUMNS,
+    LOCATION_KEY,
+    import_batch,
+    natural_key,
+    new_id_caches,
+    process_batch,
+    read_cleaned_batches,
+    upsert_listings,
+)
+from models.models import Building, Listing, Location, Owner
+
+
+def cleaned_row(url, **values):
+    """Build a cleaned CSV row with every column empty except the given ones."""
+    row = dict.fromkeys(CSV_COLUMNS)
+    row.update(url=url, **values)
+    return row
+
+
+async def count(session: AsyncSession, model) -> int:
+    """Count the rows of a table."""
+    return (await session.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_process_empty_batch(test_session: AsyncSession):
+    """Test that an empty batch imports nothing and issues no invalid statement."""
+    assert await process_batch(test_session, []) == 0
+    await upsert_listings(test_session, [])
+    
+    assert await count(test_session, Listing) == 0
+
+
+@pytest.mark.asyncio
+async def test_null_keys_deduplicated_within_batch(test_session: AsyncSession):
+    """
+    Test that rows sharing a natural key with NULL parts resolve to one row,
+    although SQLite unique indexes treat NULLs as distinct.
+    """
+    batch = [
+        cleaned_row("https://example.com/1", locality="Mokotów", full_address="Puławska 1"),
+        cleaned_row("https://example.com/2", locality="Mokotów", full_address="Puławska 1"),
+        cleaned_row("https://example.com/3", locality="Wola", street="Górczewska"),
+    ]
+    
+    assert await process_batch(test_session, batch) == 3
+    
+    assert await count(test_session, Listing) == 3
+    assert await count(test_session, Location) == 2
+    # Building and owner keys are entirely NULL in every row
+    assert await count(test_session, Building) == 1
+    assert await count(test_session, Owner) == 1
+
+
+@pytest.mark.asyncio
+async def test_existing_rows_reused(test_session: AsyncSession):
+    """Test that related rows already in the database are referenced, not duplicated."""
+    location = Location(locality="Mokotów", full_address="Puławska 1")
+    test_session.add(location)
+    await test_session.commit()
+    
+    batch = [cleaned_row("https://example.com/1", locality="Mokotów", full_address="Puławska 1")]
+    await process_batch(test_session, batch)
+    
+    listing = (await test_session.execute(select(Listing))).scalar_one()
+    assert listing.location_id == location.location_id
+    assert await count(test_session, Location) == 1
+
+
+@pytest.mark.asyncio
+async def test_conflicting_insert_reselected(test_session: AsyncSession, monkeypatch):
+    """
+    Test that a key inserted by someone else between the SELECT and the
+    INSERT is resolved by selecting it again after ON CONFLICT DO NOTHING.
+    """
+    location = Location(locality="Mokotów", street="Puławska", full_address="Puławska 1")
+    test_session.add(location)
+    await test_session.commit()
+    
+    # The first lookup misses the row, as if it was written concurrently
+    select_ids = import_listings.select_ids
+    calls = []
+    
+    async def select_ids_missing_first(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            return {}
+        return await select_ids(*args)
+    
+    monkeypatch.setattr(import_listings, "select_ids", select_ids_missing_first)
+    
+    batch = [cleaned_row(
+        "https://example.com/1", locality="Mokotów", street="Puławska", full_address="Puławska 1"
+    )]
+    await process_batch(test_session, batch)
+    
+    listing = (await test_session.execute(select(Listing))).scalar_one()
+    assert listing.location_id == location.location_id
+    assert await count(test_session, Location) == 1
+
+
+@pytest.mark.asyncio
+async def test_reimport_is_idempotent(test_session: AsyncSession):
+    """Test that importing the same rows again updates listings in place."""
+    batch = [
+        cleaned_row("https://example.com/1", locality="Mokotów", price_total_zl=Decimal("500000")),
+        cleaned_row("https://example.com/2", locality="Wola", price_total_zl=Decimal("600000")),
+    ]
+    await process_batch(test_session, batch)
+    await test_session.commit()
+    
+    batch[0]["price_total_zl"] = Decimal("450000")
+    await process_batch(test_session, batch, new_id_caches())
+    await test_session.commit()
+    
+    assert await count(test_session, Listing) == 2
+    assert await count(test_session, Location) == 2
+    price = (await test_session.execute(
+        select(Listing.price_total_zl).where(Listing.url == "https://example.com/1")
+    )).scalar_one()
+    assert price == Decimal("450000")
+
+
+@pytest.mark.asyncio
+async def test_malformed_row_skipped(test_session: AsyncSession):
+    """
+    Test that a row failing to write is skipped while the rest of its batch
+    is imported, and that ids of its rolled back rows are not cached.
+    """
+    bad = cleaned_row("https://example.com/bad", locality="Bemowo", price_total_zl=Decimal("NaN"))
+    batch = [
+        cleaned_row("https://example.com/1", locality="Mokotów"),
+        bad,
+        cleaned_row("https://example.com/2", locality="Wola"),
+    ]
+    caches = new_id_caches()
+    
+    assert await import_batch(test_session, batch, caches) == 2
+    
+    urls = (await test_session.execute(select(Listing.url).order_by(Listing.url))).scalars().all()
+    assert urls == ["https://example.com/1", "https://example.com/2"]
+    assert natural_key(bad, LOCATION_KEY) not in caches["location"]
+    assert await count(test_session, Location) == 2
+
+
+def test_short_row_read_with_empty_trailing_columns(tmp_path):
+    """Test that a row ending early is imported with its missing columns empty."""
+    csv_path = tmp_path / "listings.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        url_end = CSV_COLUMNS.index("url") + 1
+        writer.writerow(["Mokotów"] + [""] * (url_end - 2) + ["https://example.com/1"])
+    stats = {"skipped": 0, "errors": 0}
+    
+    [batch] = list(read_cleaned_batches(str(csv_path), 10, stats))
+    
+    assert stats == {"skipped": 0, "errors": 0}
+    assert [row["url"] for row in batch] == ["https://example.com/1"]
+    assert batch[0]["locality"] == "Mokotów"
+    assert batch[0]["equipment"] is None
@@ -12,6 +12,9 @@ from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.models import Listing, Location, Building, Owner, Features
+from routers import offers
+from routers.offers import clear_offers_cache, get_offers
+from utils.sorter import OfferSorter
 
 
 @pytest.fixture
@@ -26,8 +29,6 @@ async def test_offers_data(test_session: AsyncSession):
         locality="Śródmieście",
         full_address="ul. Testowa 1, Warszawa"
     )
-    test_session.add(location)
-    await test_session.flush()
     
     # Create building
     building = Building(
@@ -35,23 +36,21 @@ async def test_offers_data(test_session: AsyncSession):
         building_type="blok",
         floor=5
     )
-    test_session.add(building)
-    await test_session.flush()
     
     # Create owner
     owner = Owner(
         owner_type="biuro",
         contact_name="Test Owner"
     )
-    test_session.add(owner)
-    await test_session.flush()
     
     # Create features
     features = Features(
         has_parking=True,
         has_basement=False
     )
-    test_session.add(features)
+    
+    # One flush assigns the primary keys of all four parent rows
+    test_session.add_all([location, building, owner, features])
     await test_session.flush()
     
     # Create listings with different prices
@@ -92,8 +91,7 @@ async def test_offers_data(test_session: AsyncSession):
         ),
     ]
     
-    for listing in listings:
-        test_session.add(listing)
+    test_session.add_all(listings)
     
     await test_session.commit()
     
@@ -102,6 +100,49 @@ async def test_offers_data(test_session: AsyncSession):
     return listing_ids
 
 
+@pytest.fixture
+async def test_offers_edge_data(test_session: AsyncSession, test_offers_data):
+    """
+    Add offers with missing values on top of test_offers_data: no prices or
+    date, price_sqm_zl left to be computed, a zero area and a missing area.
+    Returns the IDs of all listings.
+    """
+    parent = await test_session.get(Listing, test_offers_data[0])
+    base_date = date.today()
+    listings = [
+        # Nothing to sort price or date by
+        Listing(area=Decimal("60.00"), rooms=3),
+        # Price per m2 computed as 8800, between the stored ones
+        Listing(
+            price_total_zl=Decimal("440000.00"),
+            area=Decimal("50.00"),
+            date_posted=base_date - timedelta(days=1),
+        ),
+        # Price per m2 cannot be computed from a zero area
+        Listing(
+            price_total_zl=Decimal("600000.00"),
+            area=Decimal("0.00"),
+            date_posted=base_date - timedelta(days=5),
+        ),
+        # Same price as an existing offer, no area
+        Listing(
+            price_total_zl=Decimal("500000.00"),
+            price_sqm_zl=Decimal("9000.00"),
+            date_posted=base_date - timedelta(days=4),
+        ),
+    ]
+    for listing in listings:
+        listing.location_id = parent.location_id
+        listing.building_id = parent.building_id
+        listing.owner_id = parent.owner_id
+        listing.features_id = parent.features_id
+    
+    test_session.add_all(listings)
+    await test_session.commit()
+    
+    return test_offers_data + [listing.listing_id for listing in listings]
+
+
 @pytest.mark.asyncio
 async def test_offers_sorted_by_price_descending(sync_test_client: TestClient, test_offers_data):
     """
@@ -126,7 +167,7 @@ async def test_offers_sorted_by_price_descending(sync_test_client: TestClient, t
     # Check that offers are sorted from most expensive to least expensive
     offers = data["offers"]
     prices = [
-        Decimal(str(offer["price_total_zl"])) 
+        offer["price_total_zl"]
         for offer in offers 
         if offer["price_total_zl"] is not None
     ]
@@ -135,11 +176,173 @@ async def test_offers_sorted_by_price_descending(sync_test_client: TestClient, t
     assert prices == sorted(prices, reverse=True), "Prices should be sorted in descending order"
     
     # Verify specific order: 800000, 500000, 300000
-    assert prices[0] == Decimal("800000.00"), "First offer should be most expensive (800000)"
-    assert prices[1] == Decimal("500000.00"), "Second offer should be middle price (500000)"
-    assert prices[2] == Decimal("300000.00"), "Third offer should be least expensive (300000)"
+    assert prices[0] == 800000.0, "First offer should be most expensive (800000)"
+    assert prices[1] == 500000.0, "Second offer should be middle price (500000)"
+    assert prices[2] == 300000.0, "Third offer should be least expensive (300000)"
     
     # Verify that all prices are in correct descending order
     for i in range(len(prices) - 1):
         assert prices[i] >= prices[i + 1], f"Price at index {i} should be >= price at index {i+1}"
 
+
+@pytest.mark.asyncio
+async def test_offers_paginated(sync_test_client: TestClient, test_offers_data):
+    """
+    Test that limit/offset return one page of the sorted offers
+    while total still counts all offers.
+    """
+    response = sync_test_client.get("/offers?sort_by=price&order=asc&limit=2&offset=1")
+    
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["total"] == 3
+    
+    prices = [offer["price_total_zl"] for offer in data["offers"]]
+    assert prices == [500000.0, 800000.0]
+
+
+@pytest.mark.parametrize(
+    "sort_by,order,sort_option",
+    [
+        ("price", "asc", "price_asc"),
+        ("price", "desc", "price_desc"),
+        ("price_per_sqm", "asc", "price_per_sqm_asc"),
+        ("price_per_sqm", "desc", "price_per_sqm_desc"),
+        ("date", "desc", "date_newest"),
+        ("area", "asc", "area_asc"),
+        ("area", "desc", "area_desc"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_offers_order_matches_sorter(
+    sync_test_client: TestClient, test_offers_edge_data, sort_by, order, sort_option
+):
+    """
+    Test that the database ordering of every sort option, including missing
+    values, computed price per m2 and ties, matches OfferSorter.
+    """
+    unsorted = sync_test_client.get("/offers").json()["offers"]
+    assert [offer["listing_id"] for offer in unsorted] == sorted(test_offers_edge_data)
+    for offer in unsorted:
+        if offer["date_posted"] is not None:
+            offer["date_posted"] = date.fromisoformat(offer["date_posted"])
+    expected = [offer["listing_id"] for offer in OfferSorter().sort(unsorted, sort_by=sort_option)]
+    
+    response = sync_test_client.get(f"/offers?sort_by={sort_by}&order={order}")
+    
+    assert response.status_code == 200
+    assert [offer["listing_id"] for offer in response.json()["offers"]] == expected
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "limit=0",
+        "limit=1001",
+        "limit=99999999999999999999",
+        "offset=-1",
+        "offset=9223372036854775808",
+        "offset=99999999999999999999",
+    ],
+)
+@pytest.mark.asyncio
+async def test_offers_page_params_out_of_range(sync_test_client: TestClient, query):
+    """
+    Test that limit/offset outside the supported range are rejected with 422
+    instead of failing when bound to SQLite.
+    """
+    response = sync_test_client.get(f"/offers?{query}")
+    
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_offers_large_offset(sync_test_client: TestClient, test_offers_data):
+    """Test that an offset past 32 bits but within SQLite's 64-bit INTEGER works."""
+    response = sync_test_client.get(f"/offers?offset={2**40}")
+    
+    assert response.status_code == 200
+    assert response.json() == {"offers": [], "total": 3}
+
+
+@pytest.mark.asyncio
+async def test_offers_field_types(test_session: AsyncSession, test_offers_data):
+    """
+    Test that offers validated straight from database rows carry
+    the field types declared on OfferResponse.
+    """
+    result = await get_offers(sort_by="price", order="asc", limit=None, offset=0, db=test_session)
+    
+    assert result.total == 3
+    for offer in result.offers:
+        assert isinstance(offer.listing_id, int)
+        assert isinstance(offer.price_total_zl, float)
+        assert isinstance(offer.price_sqm_zl, float)
+        assert isinstance(offer.area, float)
+        assert isinstance(offer.rooms, int)
+        assert isinstance(offer.date_posted, date)
+
+
+async def add_cheap_listing(session: AsyncSession, like_id: int) -> None:
+    """Insert a listing sharing the related rows of an existing one."""
+    listing = await session.get(Listing, like_id)
+    session.add(Listing(
+        location_id=listing.location_id,
+        building_id=listing.building_id,
+        owner_id=listing.owner_id,
+        features_id=listing.features_id,
+        price_total_zl=Decimal("100000.00"),
+    ))
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_offers_response_cached(test_session: AsyncSession, test_offers_data):
+    """
+    Test that identical requests within the TTL are served from cache
+    until the cache is cleared.
+    """
+    first = await get_offers(sort_by="price", order="asc", limit=10, offset=0, db=test_session)
+    
+    await add_cheap_listing(test_session, test_offers_data[0])
+    
+    cached = await get_offers(sort_by="price", order="asc", limit=10, offset=0, db=test_session)
+    assert cached is first
+    assert cached.total == 3
+    
+    clear_offers_cache()
+    fresh = await get_offers(sort_by="price", order="asc", limit=10, offset=0, db=test_session)
+    assert fresh.total == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "limit, offset", [(None, 0), (10, offers.OFFERS_CACHE_MAX_OFFSET + 1)]
+)
+async def test_offers_unbounded_pages_not_cached(
+    test_session: AsyncSession, test_offers_data, limit, offset
+):
+    """Test that unlimited pages and deep offsets always hit the database."""
+    first = await get_offers(sort_by="price", order="asc", limit=limit, offset=offset, db=test_session)
+    
+    await add_cheap_listing(test_session, test_offers_data[0])
+    
+    again = await get_offers(sort_by="price", order="asc", limit=limit, offset=offset, db=test_session)
+    assert again is not first
+    assert again.total == 4
+
+
+@pytest.mark.asyncio
+async def test_offers_cache_bounded_by_rows(
+    test_session: AsyncSession, test_offers_data, monkeypatch
+):
+    """Test that the least recently used pages are evicted past OFFERS_CACHE_MAX_ROWS."""
+    monkeypatch.setattr(offers, "OFFERS_CACHE_MAX_ROWS", 4)
+    
+    oldest = await get_offers(sort_by="price", order="asc", limit=2, offset=0, db=test_session)
+    await get_offers(sort_by="price", order="asc", limit=2, offset=1, db=test_session)
+    # A fifth cached offer exceeds the bound of four, evicting the oldest page
+    await get_offers(sort_by="area", order="asc", limit=1, offset=0, db=test_session)
+    
+    assert await get_offers(sort_by="price", order="asc", limit=2, offset=0, db=test_session) is not oldest
@@ -15,7 +15,7 @@ import pytest
 from datetime import date, timedelta
 from decimal import Decimal
 
-from utils.sorter import OfferSorter
+from utils.sorter import OfferSorter, offer_sorter
 
 
 @pytest.fixture
@@ -288,4 +288,44 @@ class TestOfferSorterEdgeCases:
         
         assert mock_offers == original_offers
         assert sorted_offers != original_offers  # Should be sorted differently
+    
+    def test_sort_inplace(self, mock_offers):
+        """Test that inplace sorting reorders and returns the given list."""
+        sorter = OfferSorter()
+        sorted_offers = sorter.sort(mock_offers, sort_by="price_asc", inplace=True)
+        
+        assert sorted_offers is mock_offers
+        assert [offer["listing_id"] for offer in mock_offers] == [2, 4, 1, 5, 3]
+    
+    @pytest.mark.parametrize("sort_by", ["price_asc", "price_desc", "date_newest"])
+    def test_sort_with_limit(self, sort_by):
+        """Test that limit returns the head of the full sort, ties included."""
+        base_date = date.today()
+        offers = [
+            {
+                "listing_id": i,
+                "price_total_zl": Decimal(300000 + (i * 7919) % 13 * 10000),
+                "date_posted": base_date - timedelta(days=i % 5),
+            }
+            for i in range(100)
+        ]
+        sorter = OfferSorter()
+        
+        for limit in (0, 3, 50, 200):
+            assert sorter.sort(offers, sort_by=sort_by, limit=limit) == (
+                sorter.sort(offers, sort_by=sort_by)[:limit]
+            )
+    
+    def test_sort_with_negative_limit(self, mock_offers):
+        """Test that a negative limit is rejected."""
+        sorter = OfferSorter()
+        
+        with pytest.raises(ValueError, match="Invalid limit"):
+            sorter.sort(mock_offers, sort_by="price_asc", limit=-1)
+    
+    def test_shared_sorter_instance(self, mock_offers):
+        """Test that the module-level sorter sorts like a new instance."""
+        assert offer_sorter.sort(mock_offers, sort_by="area_desc") == (
+            OfferSorter().sort(mock_offers, sort_by="area_desc")
+        )
 
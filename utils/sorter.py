@@ -8,10 +8,9 @@ Implements sorting functionality according to User Story 4.3:
 - Area (ascending/descending)
 - Default: "Najtrafniejsze" (relevance-based, returns unchanged list)
 """
+import heapq
 from enum import Enum
 from typing import List, Dict, Any, Optional, Callable, Tuple
-from decimal import Decimal
-from datetime import date
 
 
 class SortOption(str, Enum):
@@ -27,29 +26,133 @@ class SortOption(str, Enum):
     NAJTRAFNIEJSZE = "najtrafniejsze"
 
 
+# Maximum values for None handling
+MAX_PRICE = float("inf")
+MAX_AREA = float("inf")
+
+
+def _make_float_key(
+    field: str, 
+    sentinel: float
+) -> Callable[[Dict[str, Any]], float]:
+    """
+    Build a sort key reading one numeric field of an offer as float.
+    
+    None values are replaced by sentinel (MAX_PRICE/MAX_AREA) to place them
+    at the end when sorting ascending, or at the beginning when sorting
+    descending. Keys are only compared, never shown, so a float is enough
+    and much cheaper to build and compare than a Decimal. The sentinel and
+    float() are bound as locals, as the key runs once per offer.
+    
+    Args:
+        field: Offer dictionary key to read
+        sentinel: Key used when the field is missing or None
+    
+    Returns:
+        Key function for list.sort/sorted
+    """
+    def key(offer: Dict[str, Any], sentinel: float = sentinel, to_float=float) -> float:
+        value = offer.get(field)
+        return sentinel if value is None else to_float(value)
+    
+    return key
+
+
+_get_price_value = _make_float_key("price_total_zl", MAX_PRICE)
+_get_area_value = _make_float_key("area", MAX_AREA)
+
+
+def _calculate_price_per_sqm(
+    price_total: Optional[Any], 
+    area: Optional[Any]
+) -> Optional[float]:
+    """
+    Calculate price per square meter from total price and area.
+    
+    Args:
+        price_total: Total price (Decimal, float or int) or None
+        area: Area (Decimal, float or int) or None
+    
+    Returns:
+        Calculated price per square meter as float, or None if cannot calculate
+    """
+    # Falsy covers both None and a zero area, whatever the number type
+    if price_total is None or not area:
+        return None
+    return float(price_total) / float(area)
+
+
+def _get_price_per_sqm_value(offer: Dict[str, Any]) -> float:
+    """
+    Extract price per square meter value from offer.
+    
+    First tries price_sqm_zl, if not available calculates from price_total_zl / area.
+    Handles None values.
+    
+    Args:
+        offer: Offer dictionary
+    
+    Returns:
+        Price per square meter as float, or MAX_PRICE if cannot determine
+    """
+    # Try to get price_sqm_zl directly
+    price_per_sqm = offer.get("price_sqm_zl")
+    if price_per_sqm is not None:
+        return float(price_per_sqm)
+    
+    # Calculate from price_total_zl / area if price_sqm_zl is not available
+    calculated_price = _calculate_price_per_sqm(offer.get("price_total_zl"), offer.get("area"))
+    if calculated_price is not None:
+        return calculated_price
+    
+    # If cannot calculate, treat as maximum value
+    return MAX_PRICE
+
+
+def _get_date_value(offer: Dict[str, Any]) -> int:
+    """
+    Extract date value from offer as a day ordinal, handling None values.
+    
+    Comparing small ints is cheaper than comparing date objects. None values
+    are treated as day 0, before date.min, to place them at the end when
+    sorting by newest first.
+    """
+    date_posted = offer.get("date_posted")
+    if date_posted is None:
+        return 0
+    return date_posted.toordinal()
+
+
+# limit must be below len(offers) // TOP_K_RATIO for sort() to pick the top
+# offers with a heap instead of sorting the whole list
+TOP_K_RATIO = 8
+
+
+# Sort option -> (key function, reverse), built once at import. SortOption is a
+# str enum, so members and their string values find the same entry.
+_SORT_STRATEGIES: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], bool]] = {
+    SortOption.PRICE_ASC.value: (_get_price_value, False),
+    SortOption.PRICE_DESC.value: (_get_price_value, True),
+    SortOption.PRICE_PER_SQM_ASC.value: (_get_price_per_sqm_value, False),
+    SortOption.PRICE_PER_SQM_DESC.value: (_get_price_per_sqm_value, True),
+    SortOption.DATE_NEWEST.value: (_get_date_value, True),
+    SortOption.AREA_ASC.value: (_get_area_value, False),
+    SortOption.AREA_DESC.value: (_get_area_value, True),
+}
+
+
 class OfferSorter:
     """Class for sorting listing offers based on various criteria."""
     
-    # Maximum values for None handling
-    MAX_PRICE = Decimal("999999999999.99")
-    MAX_AREA = Decimal("999999999.99")
-    
-    def __init__(self):
-        """Initialize OfferSorter with sort strategy mapping."""
-        self._sort_strategies: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], bool]] = {
-            SortOption.PRICE_ASC.value: (self._get_price_value, False),
-            SortOption.PRICE_DESC.value: (self._get_price_value, True),
-            SortOption.PRICE_PER_SQM_ASC.value: (self._get_price_per_sqm_value, False),
-            SortOption.PRICE_PER_SQM_DESC.value: (self._get_price_per_sqm_value, True),
-            SortOption.DATE_NEWEST.value: (self._get_date_value, True),
-            SortOption.AREA_ASC.value: (self._get_area_value, False),
-            SortOption.AREA_DESC.value: (self._get_area_value, True),
-        }
+    MAX_PRICE = MAX_PRICE
+    MAX_AREA = MAX_AREA
     
     def sort(
         self, 
         offers: List[Dict[str, Any]], 
-        sort_by: Optional[str] = None
+        sort_by: Optional[str] = None,
+        inplace: bool = False,
+        limit: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         """
         Sort offers based on the specified criteria.
@@ -66,150 +169,51 @@ class OfferSorter:
                 - "area_asc": Area ascending
                 - "area_desc": Area descending
                 - "najtrafniejsze" or None: Default relevance-based (unchanged)
+            inplace: Sort the given list itself and return it instead of a new
+                list. For callers that own the list, e.g. one built from a query.
+            limit: Return only the first limit offers of the sorted order, as a
+                new list; inplace is then ignored. A small limit is served with
+                heapq instead of a full sort.
         
         Returns:
-            Sorted list of offers (new list, original is not modified)
+            Sorted list of offers (new list, original is not modified, unless
+            inplace is True)
         
         Raises:
-            ValueError: If sort_by is not a valid option
+            ValueError: If sort_by is not a valid option or limit is negative
         """
-        if not offers:
-            return []
+        if limit is not None and limit < 0:
+            raise ValueError(f"Invalid limit: {limit}")
         
-        # Normalize sort_by to string
-        sort_key = self._normalize_sort_option(sort_by)
+        if not offers:
+            return offers if inplace else []
         
         # Default sorting: return unchanged list
-        if sort_key is None or sort_key == SortOption.NAJTRAFNIEJSZE.value:
-            return offers.copy()
-        
-        # Validate sort option
-        if sort_key not in self._sort_strategies:
-            raise ValueError(f"Invalid sort option: {sort_by}")
-        
-        # Get sort strategy
-        key_func, reverse = self._sort_strategies[sort_key]
-        
-        # Create a copy and sort
-        sorted_offers = offers.copy()
-        sorted_offers.sort(key=key_func, reverse=reverse)
-        
-        return sorted_offers
-    
-    def _normalize_sort_option(self, sort_by: Optional[str]) -> Optional[str]:
-        """
-        Normalize sort option to string value.
-        
-        Args:
-            sort_by: Sort option as string or None
-        
-        Returns:
-            Normalized string value or None
-        """
-        if sort_by is None:
-            return None
-        
-        # Convert enum to string if needed
-        if isinstance(sort_by, SortOption):
-            return sort_by.value
-        
-        return sort_by
-    
-    def _get_price_value(self, offer: Dict[str, Any]) -> Decimal:
-        """
-        Extract price value from offer, handling None values.
-        
-        None values are treated as maximum value to place them at the end
-        when sorting ascending, or at the beginning when sorting descending.
-        
-        Args:
-            offer: Offer dictionary
-        
-        Returns:
-            Price as Decimal, or MAX_PRICE if None
-        """
-        price = offer.get("price_total_zl")
-        if price is None:
-            return self.MAX_PRICE
-        return Decimal(str(price))
-    
-    def _calculate_price_per_sqm(
-        self, 
-        price_total: Optional[Decimal], 
-        area: Optional[Decimal]
-    ) -> Optional[Decimal]:
-        """
-        Calculate price per square meter from total price and area.
-        
-        Args:
-            price_total: Total price as Decimal or None
-            area: Area as Decimal or None
-        
-        Returns:
-            Calculated price per square meter as Decimal, or None if cannot calculate
-        """
-        if price_total is None or area is None or area == 0:
-            return None
-        return Decimal(str(price_total)) / Decimal(str(area))
-    
-    def _get_price_per_sqm_value(self, offer: Dict[str, Any]) -> Decimal:
-        """
-        Extract price per square meter value from offer.
-        
-        First tries price_sqm_zl, if not available calculates from price_total_zl / area.
-        Handles None values.
-        
-        Args:
-            offer: Offer dictionary
-        
-        Returns:
-            Price per square meter as Decimal, or MAX_PRICE if cannot determine
-        """
-        # Try to get price_sqm_zl directly
-        price_per_sqm = offer.get("price_sqm_zl")
-        if price_per_sqm is not None:
-            return Decimal(str(price_per_sqm))
-        
-        # Calculate from price_total_zl / area if price_sqm_zl is not available
-        price_total = offer.get("price_total_zl")
-        area = offer.get("area")
-        
-        calculated_price = self._calculate_price_per_sqm(price_total, area)
-        if calculated_price is not None:
-            return calculated_price
-        
-        # If cannot calculate, treat as maximum value
-        return self.MAX_PRICE
-    
-    def _get_date_value(self, offer: Dict[str, Any]) -> date:
-        """
-        Extract date value from offer, handling None values.
-        
-        None values are treated as minimum date to place them at the end
-        when sorting by newest first.
-        """
-        date_posted = offer.get("date_posted")
-        if date_posted is None:
-            # Use minimum date to place None at the end when sorting newest first
-            return date.min
-        # Return date_posted as-is (should already be a date object)
-        return date_posted
-    
-    def _get_area_value(self, offer: Dict[str, Any]) -> Decimal:
-        """
-        Extract area value from offer, handling None values.
-        
-        None values are treated as maximum value to place them at the end
-        when sorting ascending, or at the beginning when sorting descending.
-        
-        Args:
-            offer: Offer dictionary
-        
-        Returns:
-            Area as Decimal, or MAX_AREA if None
-        """
-        area = offer.get("area")
-        if area is None:
-            return self.MAX_AREA
-        return Decimal(str(area))
+        if sort_by is None or sort_by == SortOption.NAJTRAFNIEJSZE:
+            if limit is not None:
+                return offers[:limit]
+            return offers if inplace else offers.copy()
+        
+        try:
+            key_func, reverse = _SORT_STRATEGIES[sort_by]
+        except KeyError:
+            raise ValueError(f"Invalid sort option: {sort_by}") from None
+        
+        if limit is not None:
+            if limit < len(offers) // TOP_K_RATIO:
+                # Same result as sorted(...)[:limit], ties included, in O(n log k)
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                return select(limit, offers, key=key_func)
+            return sorted(offers, key=key_func, reverse=reverse)[:limit]
+        
+        if inplace:
+            offers.sort(key=key_func, reverse=reverse)
+            return offers
+        
+        # sorted() already returns a new list
+        return sorted(offers, key=key_func, reverse=reverse)
+
 
+# OfferSorter keeps no state, so callers can share this instance instead of
+# creating their own
+offer_sorter = OfferSorter()